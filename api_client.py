@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import random
+import time
+from http import HTTPStatus
+
+import requests
+from requests.adapters import HTTPAdapter
+
+bot_logger = logging.getLogger('homework')
+
+RETRY_STATUSES = frozenset({
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+})
+
+
+# response header -> conditional request header
+VALIDATORS = (
+    ('ETag', 'If-None-Match'), ('Last-Modified', 'If-Modified-Since')
+)
+
+
+def conditional_headers(headers: dict, validators: dict) -> dict:
+    """Заголовки запроса с If-None-Match/If-Modified-Since, если они есть."""
+    if not validators:
+        return headers
+    headers = dict(headers)
+    for name, condition in VALIDATORS:
+        if name in validators:
+            headers[condition] = validators[name]
+    return headers
+
+
+def remember_validators(response, validators: dict) -> None:
+    """Сохранить ETag/Last-Modified из ответа для следующего запроса."""
+    headers = getattr(response, 'headers', None) or {}
+    for name, _ in VALIDATORS:
+        value = headers.get(name)
+        if value:
+            validators[name] = value
+
+
+def body_hash(body: bytes) -> bytes:
+    """Короткий хеш тела ответа для пропуска повторной разборки."""
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+class PracticumClient:
+    """
+    HTTP-клиент API Практикума поверх одной `requests.Session`.
+    Держит пул keep-alive соединений (без TLS-рукопожатия на каждый опрос),
+    задаёт таймауты и повторяет запрос с джиттером при 5xx/429.
+    После `stop.set()` повторов нет, пауза перед повтором прерывается.
+    Интерфейс `get()` совпадает с `requests.get`.
+    """
+
+    def __init__(self, pool_size: int = 10, timeout=(3.05, 10),
+                 retries: int = 2, backoff: float = 0.5,
+                 max_backoff: float = 10.0, stop=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stop = stop
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _delay(self, attempt: int, response=None) -> float:
+        """Пауза перед повтором: Retry-After либо экспонента с джиттером."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+        return random.uniform(delay / 2, delay)
+
+    def _pause(self, delay: float) -> bool:
+        """Пауза перед повтором; False — клиент останавливается."""
+        if self.stop is None:
+            time.sleep(delay)
+            return True
+        return not self.stop.wait(delay)
+
+    def get(self, url, **kwargs):
+        """GET с повторами. Возвращает последний ответ сервера."""
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.retries + 1):
+            last_try = attempt == self.retries or (
+                self.stop is not None and self.stop.is_set()
+            )
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                if last_try:
+                    raise
+                bot_logger.warning('GET %s failed: %s, retrying', url, err)
+                if not self._pause(self._delay(attempt)):
+                    raise
+                continue
+            if response.status_code not in RETRY_STATUSES or last_try:
+                return response
+            bot_logger.warning(
+                'GET %s: %s, retrying', url, response.status_code
+            )
+            if not self._pause(self._delay(attempt, response)):
+                return response
+            response.close()
+
+    def close(self) -> None:
+        self.session.close()
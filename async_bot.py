@@ -0,0 +1,262 @@
+"""
+Асинхронный режим бота (`python homework.py --async`).
+Опросы API Практикума и отправки в Telegram выполняются конкурентно
+в одном event loop, медленный ответ одного сервиса не блокирует остальных.
+"""
+import asyncio
+import logging
+import sys
+import time
+from http import HTTPStatus
+
+import aiohttp
+
+import homework
+import metrics
+from circuit_breaker import upstream_failed
+from dedup import notification_key
+from error_state import error_key
+from exceptions import NotifiableError, PracticumApiErr, TelegramSendErr
+from scheduler import AdaptiveInterval, PollOutcome
+from state_store import StateStore
+from validation import decode, validate_response
+
+bot_logger = logging.getLogger('homework')
+
+TELEGRAM_API = 'https://api.telegram.org/bot{token}/sendMessage'
+# Max simultaneous HTTP requests (polls + sends) across all subscribers
+CONCURRENCY = 64
+
+
+async def get_api_answer(session, headers, current_timestamp):
+    """
+    Асинхронный запрос статусов домашних работ.
+    Тело ответа декодируется один раз (см. validation.decode).
+    """
+    timestamp = current_timestamp or int(time.time())
+    params = {'from_date': timestamp}
+    breaker = homework.PRACTICUM_BREAKER
+    if not breaker.allow():
+        raise PracticumApiErr(homework.circuit_open_message(), 'ENDPOINT_ERR')
+    started = time.perf_counter()
+    try:
+        async with session.get(
+            homework.ENDPOINT, headers=headers, params=params
+        ) as response:
+            if upstream_failed(response.status):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if response.status != HTTPStatus.OK:
+                err_message = (f'Нет ответа от сервиса Практикум.Домашка. '
+                               f'Ошибка {response.status}!')
+                raise PracticumApiErr(err_message, 'ENDPOINT_ERR')
+            return decode(await response.read())
+    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+        breaker.record_failure()
+        raise PracticumApiErr(
+            f'Нет ответа от сервиса Практикум.Домашка. {err!r}', 'ENDPOINT_ERR'
+        )
+    finally:
+        metrics.API_LATENCY.observe(time.perf_counter() - started)
+
+
+async def check_response(response) -> tuple:
+    """
+    Проверка ответа API и всех работ в нём за один проход.
+    Возвращает (current_date, [Homework, ...]).
+    """
+    return validate_response(response, homework.HOMEWORK_STATUSES)
+
+
+async def parse_status(hw, locale=None) -> str:
+    """Сообщение о статусе проверенной домашней работы."""
+    return homework.status_message(hw, locale)
+
+
+async def send_message(session, chat_id, message) -> None:
+    """Асинхронная отправка сообщения через Telegram Bot API."""
+    url = TELEGRAM_API.format(token=homework.TELEGRAM_TOKEN)
+    bot_logger.debug('Send message to %s: %s', chat_id, message)
+    started = time.perf_counter()
+    try:
+        async with session.post(
+            url, json={'chat_id': chat_id, 'text': message}
+        ) as response:
+            answer = await response.json(content_type=None)
+    except aiohttp.ClientError as err:
+        answer = {'ok': False, 'description': f'{type(err).__name__}: {err}'}
+    metrics.SEND_LATENCY.observe(time.perf_counter() - started)
+    if answer.get('ok'):
+        metrics.MESSAGES_SENT.inc()
+    else:
+        metrics.MESSAGES_FAILED.inc()
+        raise TelegramSendErr(
+            (f'{answer.get("description")}. '
+             f'Не удалось отправить сообщение в Telegram-чат!')
+        )
+
+
+async def errors_sender(session, subscription, err_msg, err_key) -> None:
+    """Одно сообщение об ошибке подписчику до момента её исправления."""
+    if err_key in subscription.errors:
+        return
+    try:
+        await send_message(session, subscription.chat_id, err_msg)
+    except TelegramSendErr as err:
+        bot_logger.error(err)
+        return
+    subscription.errors.mark(err_key)
+
+
+async def notify_subscriber(session, semaphore, subscription, homeworks,
+                            dedup=None, events=None) -> None:
+    """
+    Уведомления подписчику о сменах статусов, без повторов (`dedup`).
+    Отправленные смены статусов пишутся в журнал `events`.
+    Сбой отправки не отменяет остальные: запоминаются все доставленные,
+    первая ошибка пробрасывается после.
+    """
+    changes = {}
+    for hw in homeworks:
+        message = await parse_status(hw, subscription.locale)
+        subscription.track_status(hw)
+        key = notification_key(subscription.chat_id, hw)
+        if dedup is None or not dedup.is_duplicate(key):
+            changes[key] = (hw, message)
+    async with semaphore:
+        results = await asyncio.gather(*(
+            send_message(session, subscription.chat_id, message)
+            for _, message in changes.values()
+        ), return_exceptions=True)
+    failed = None
+    for (key, (hw, _)), result in zip(changes.items(), results):
+        if isinstance(result, BaseException):
+            failed = failed or result
+            continue
+        if dedup is not None:
+            dedup.remember(key)
+        if events is not None:
+            events.record_event(subscription.chat_id, hw)
+    if failed is not None:
+        raise failed
+
+
+async def poll_subscriber(session, semaphore, subscription,
+                          dedup=None, events=None) -> PollOutcome:
+    """Один цикл опроса и уведомления подписчика."""
+    headers = {'Authorization': f'OAuth {subscription.token}'}
+    try:
+        async with semaphore:
+            response = await get_api_answer(
+                session, headers, subscription.current_date
+            )
+        current_date, homeworks = await check_response(response)
+        await notify_subscriber(
+            session, semaphore, subscription, homeworks, dedup, events
+        )
+        subscription.current_date = current_date
+        subscription.errors.clear()
+        return PollOutcome.CHANGED if homeworks else PollOutcome.UNCHANGED
+
+    except TelegramSendErr as err:
+        bot_logger.error(err)
+        return PollOutcome.CHANGED
+
+    except (NotifiableError, KeyError) as err:
+        if error_key(err) is None:
+            bot_logger.error(f'Сбой в работе программы: {err}', exc_info=True)
+            return PollOutcome.ERROR
+        err_name, (err_msg, err_key) = type(err).__name__, err.args
+        bot_logger.error('[%s] %s: %s', subscription.key, err_name, err_msg)
+        metrics.API_ERRORS.labels(err_key).inc()
+        async with semaphore:
+            await errors_sender(
+                session, subscription, f'{err_name}: {err_msg}', err_key
+            )
+
+    except Exception as err:
+        bot_logger.error(f'Сбой в работе программы: {err}', exc_info=True)
+    return PollOutcome.ERROR
+
+
+async def sleep_until_stop(stop, delay) -> None:
+    """Пауза на `delay` секунд, прерываемая остановкой бота."""
+    try:
+        await asyncio.wait_for(stop.wait(), delay)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def subscriber_loop(session, semaphore, interval, store, dedup,
+                          subscription, offset, stop) -> None:
+    """Цикл опроса одного подписчика со сдвигом по окну до `stop.set()`."""
+    await sleep_until_stop(stop, offset)
+    while not stop.is_set():
+        started = time.monotonic()
+        outcome = await poll_subscriber(
+            session, semaphore, subscription, dedup, store
+        )
+        elapsed = time.monotonic() - started
+        metrics.POLL_DURATION.observe(elapsed)
+        homework.POLL_COUNTERS[outcome].inc()
+        homework.checkpoint(store, subscription)
+        delay = interval.next_delay(subscription, outcome)
+        await sleep_until_stop(stop, max(delay - elapsed, 0))
+
+
+async def run(registry, store, concurrency: int = CONCURRENCY) -> None:
+    """
+    Запуск опроса всех подписчиков в одном event loop.
+    По SIGTERM/SIGINT новые опросы не начинаются, текущие завершаются
+    (не дольше SHUTDOWN_TIMEOUT секунд).
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in homework.SHUTDOWN_SIGNALS:
+        loop.add_signal_handler(signum, stop.set)
+    semaphore = asyncio.Semaphore(concurrency)
+    interval = AdaptiveInterval(
+        homework.POLL_MIN_INTERVAL, homework.RETRY_TIME,
+        homework.POLL_MAX_INTERVAL
+    )
+    dedup = homework.make_deduplicator(store)
+    timeout = aiohttp.ClientTimeout(total=homework.RETRY_TIME)
+    step = homework.RETRY_TIME / max(len(registry), 1)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        loops = asyncio.gather(*(
+            subscriber_loop(
+                session, semaphore, interval, store, dedup, subscription,
+                position * step, stop
+            )
+            for position, subscription in enumerate(registry)
+        ))
+        stopping = asyncio.ensure_future(stop.wait())
+        await asyncio.wait(
+            (loops, stopping), return_when=asyncio.FIRST_COMPLETED
+        )
+        stopping.cancel()
+        try:
+            await asyncio.wait_for(loops, homework.SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            bot_logger.warning('Shutdown timeout, polls in flight cancelled')
+        bot_logger.info('Stopped')
+
+
+def main() -> None:
+    """Точка входа асинхронного режима."""
+    problems = homework.check_config()
+    for problem in problems:
+        bot_logger.critical(problem)
+    if problems:
+        sys.exit(1)
+    store = StateStore(homework.STATE_DB)
+    store.start()
+    registry = homework.load_registry(store)
+    bot_logger.info(f'Async mode, subscribers: {len(registry)}')
+    if homework.METRICS_PORT:
+        metrics.start_http_server(homework.METRICS_PORT)
+    try:
+        asyncio.run(run(registry, store))
+    finally:
+        store.close()
@@ -0,0 +1,189 @@
+"""
+Локальные заглушки API Практикум.Домашки и Telegram Bot API для бенчмарков.
+Каждый сервер запускается в отдельном процессе, чтобы CPU и память
+бота измерялись без учёта заглушек.
+"""
+import json
+import math
+import multiprocessing
+import random
+import re
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STATUSES = ('reviewing', 'approved', 'rejected')
+# homework_name carries the moment of change to measure delivery latency
+NAME_PATTERN = re.compile(r'bench-(\d+)-\d+')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, share: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, math.ceil(share * len(values)) - 1)
+    return values[max(index, 0)]
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, data) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class PracticumState:
+    """
+    Изменения статусов генерируются лениво при запросе: за время с прошлого
+    опроса у подписчика случается в среднем `change_rate * dt` изменений.
+    """
+
+    def __init__(self, change_rate: float):
+        self.change_rate = change_rate
+        self.lock = threading.Lock()
+        self.last_seen = {}
+        self.counter = 0
+        self.requests = 0
+        self.errors = 0
+
+    def changes(self, token: str, now: float) -> list:
+        with self.lock:
+            self.requests += 1
+            since = self.last_seen.get(token, now)
+            self.last_seen[token] = now
+            expected = self.change_rate * (now - since)
+            count = int(expected) + (random.random() < expected % 1)
+            homeworks = []
+            for _ in range(count):
+                self.counter += 1
+                changed_at = random.uniform(since, now)
+                homeworks.append({
+                    'id': self.counter,
+                    'homework_name': (
+                        f'bench-{int(changed_at * 1000)}-{self.counter}'
+                    ),
+                    'status': random.choice(STATUSES),
+                    'lesson_name': f'Lesson {self.counter % 10}',
+                    'reviewer_comment': 'ok',
+                    'date_updated': datetime.fromtimestamp(
+                        changed_at, timezone.utc
+                    ).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                })
+            return homeworks
+
+
+def serve_practicum(port: int, latency: float, error_rate: float,
+                    change_rate: float) -> None:
+    """Заглушка ENDPOINT: GET .../homework_statuses/?from_date=..."""
+    state = PracticumState(change_rate)
+
+    class Handler(QuietHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/stats':
+                return self.send_json(200, {
+                    'requests': state.requests, 'errors': state.errors,
+                })
+            time.sleep(latency)
+            token = self.headers.get('Authorization', '')
+            if 'from_date' not in parse_qs(url.query):
+                return self.send_json(400, {'code': 'UnknownError'})
+            if random.random() < error_rate:
+                with state.lock:
+                    state.requests += 1
+                    state.errors += 1
+                return self.send_json(500, {'code': 'ServerError'})
+            now = time.time()
+            self.send_json(200, {
+                'homeworks': state.changes(token, now),
+                'current_date': int(now),
+            })
+
+    ThreadingHTTPServer(('127.0.0.1', port), Handler).serve_forever()
+
+
+def serve_telegram(port: int, latency: float, error_rate: float) -> None:
+    """Заглушка Telegram Bot API: POST /bot<token>/sendMessage."""
+    lock = threading.Lock()
+    stats = {'messages': 0, 'rate_limited': 0}
+    latencies = []
+
+    class Handler(QuietHandler):
+
+        def do_GET(self):
+            with lock:
+                values = list(latencies)
+                data = dict(stats)
+            data.update({
+                'latency_p50': percentile(values, 0.5),
+                'latency_p99': percentile(values, 0.99),
+            })
+            self.send_json(200, data)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            payload = self.rfile.read(length)
+            time.sleep(latency)
+            if random.random() < error_rate:
+                with lock:
+                    stats['rate_limited'] += 1
+                return self.send_json(429, {
+                    'ok': False, 'error_code': 429,
+                    'description': 'Too Many Requests: retry after 1',
+                    'parameters': {'retry_after': 1},
+                })
+            try:
+                data = json.loads(payload)
+            except ValueError:
+                data = {key: values[0] for key, values in parse_qs(
+                    payload.decode()
+                ).items()}
+            text = str(data.get('text', ''))
+            received = time.time()
+            with lock:
+                stats['messages'] += 1
+                for match in NAME_PATTERN.finditer(text):
+                    latencies.append(received - int(match.group(1)) / 1000)
+            self.send_json(200, {'ok': True, 'result': {
+                'message_id': stats['messages'],
+                'date': int(received),
+                'chat': {'id': int(data.get('chat_id', 0)), 'type': 'private'},
+                'text': text,
+            }})
+
+    ThreadingHTTPServer(('127.0.0.1', port), Handler).serve_forever()
+
+
+def start(target, *args) -> multiprocessing.Process:
+    process = multiprocessing.Process(target=target, args=args, daemon=True)
+    process.start()
+    return process
+
+
+def wait_for_port(port: int, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f'Fake server on port {port} did not start')
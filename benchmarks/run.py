@@ -0,0 +1,154 @@
+"""
+Бенчмарк цикла опроса на локальных заглушках Практикума и Telegram.
+
+    python -m benchmarks.run --subscribers 1000 --duration 60 --interval 5
+
+Отчёт: опросов в секунду, p50/p99 задержки уведомления (от смены статуса
+до получения сообщения заглушкой Telegram), CPU и пиковый RSS процесса бота.
+"""
+import argparse
+import json
+import resource
+import tempfile
+import threading
+import time
+import urllib.request
+
+import homework
+from api_client import PracticumClient
+from benchmarks import fake_servers
+from dedup import NotificationDeduplicator
+from state_store import StateStore
+from subscribers import SubscriberRegistry, Subscription
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=30,
+                        help='seconds to run the polling loop')
+    parser.add_argument('--interval', type=float, default=5,
+                        help='base poll interval (RETRY_TIME), seconds')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='keep adaptive backoff instead of fixed interval')
+    parser.add_argument('--waves', action='store_true',
+                        help='bulk poll in fixed-size waves (POLL_MODE=waves)')
+    parser.add_argument('--workers', type=int, default=homework.POLL_WORKERS)
+    parser.add_argument('--send-workers', type=int,
+                        default=homework.SEND_WORKERS)
+    parser.add_argument('--send-rate', type=float, default=1000,
+                        help='global Telegram send rate, msg/s')
+    parser.add_argument('--api-latency', type=float, default=0.05)
+    parser.add_argument('--api-error-rate', type=float, default=0.0)
+    parser.add_argument('--change-rate', type=float, default=0.01,
+                        help='status changes per second per subscriber')
+    parser.add_argument('--tg-latency', type=float, default=0.02)
+    parser.add_argument('--tg-error-rate', type=float, default=0.0,
+                        help='share of sendMessage calls answered with 429')
+    parser.add_argument('--json', action='store_true',
+                        help='print the report as JSON')
+    return parser.parse_args(argv)
+
+
+def fetch_stats(port: int) -> dict:
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/stats') as answer:
+        return json.load(answer)
+
+
+def configure(args, api_port: int) -> None:
+    """Направить бота на заглушки и применить параметры нагрузки."""
+    homework.ENDPOINT = (
+        f'http://127.0.0.1:{api_port}/api/user_api/homework_statuses/'
+    )
+    homework.TELEGRAM_TOKEN = '123:bench'
+    homework.RETRY_TIME = args.interval
+    if not args.adaptive:
+        homework.POLL_MIN_INTERVAL = args.interval
+        homework.POLL_MAX_INTERVAL = args.interval
+    homework.POLL_WORKERS = homework.WAVE_SIZE = args.workers
+    homework.SEND_WORKERS = args.send_workers
+    homework.SEND_GLOBAL_RATE = args.send_rate
+    homework.SEND_CHAT_RATE = 1000
+    homework.API_CLIENT = PracticumClient(pool_size=args.workers, retries=0)
+
+
+def run(args) -> dict:
+    api_port, tg_port = fake_servers.free_port(), fake_servers.free_port()
+    servers = [
+        fake_servers.start(
+            fake_servers.serve_practicum, api_port, args.api_latency,
+            args.api_error_rate, args.change_rate
+        ),
+        fake_servers.start(
+            fake_servers.serve_telegram, tg_port, args.tg_latency,
+            args.tg_error_rate
+        ),
+    ]
+    fake_servers.wait_for_port(api_port)
+    fake_servers.wait_for_port(tg_port)
+    configure(args, api_port)
+
+    now = int(time.time())
+    registry = SubscriberRegistry(
+        Subscription(token=f'token-{number}', chat_id=str(number),
+                     current_date=now)
+        for number in range(args.subscribers)
+    )
+    bot = homework.make_bot(base_url=f'http://127.0.0.1:{tg_port}/bot')
+    bot.start()
+    stop = threading.Event()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = StateStore(f'{tmp}/state.sqlite3')
+        store.start()
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        started = time.monotonic()
+        loop = threading.Thread(
+            target=homework.run_waves if args.waves else homework.run_polling,
+            args=(bot, registry, store, NotificationDeduplicator(), stop),
+        )
+        loop.start()
+        time.sleep(args.duration)
+        stop.set()
+        loop.join()
+        bot.close(timeout=10)
+        elapsed = time.monotonic() - started
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        store.close()
+
+    api_stats, tg_stats = fetch_stats(api_port), fetch_stats(tg_port)
+    for server in servers:
+        server.terminate()
+    cpu = (usage.ru_utime - usage_before.ru_utime
+           + usage.ru_stime - usage_before.ru_stime)
+    return {
+        'subscribers': args.subscribers,
+        'duration_s': round(elapsed, 2),
+        'polls': api_stats['requests'],
+        'polls_per_s': round(api_stats['requests'] / elapsed, 1),
+        'api_errors': api_stats['errors'],
+        'messages': tg_stats['messages'],
+        'tg_rate_limited': tg_stats['rate_limited'],
+        'latency_p50_s': round(tg_stats['latency_p50'], 3),
+        'latency_p99_s': round(tg_stats['latency_p99'], 3),
+        'cpu_s': round(cpu, 2),
+        'cpu_per_poll_ms': round(
+            1000 * cpu / max(api_stats['requests'], 1), 3
+        ),
+        'max_rss_mb': round(usage.ru_maxrss / 1024, 1),
+        'send_queue': bot.stats(),
+    }
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, value in report.items():
+        print(f'{key:>18}: {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,61 @@
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 
+# Defaults of LOG_LEVEL and LOG_FORMAT (text | json) env variables
+LOG_LEVEL = 'DEBUG'
+LOG_FORMAT = 'text'
 
-def logger_config(logger):
-    logger.setLevel(logging.DEBUG)
+
+class _Listener(QueueListener):
+    """QueueListener, который можно останавливать повторно (atexit)."""
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись лога — одна JSON-строка."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def logger_config(logger, level=None, log_format=None):
+    """
+    Логи пишутся в stdout из отдельного потока (QueueListener),
+    поток опроса только кладёт запись в очередь.
+    Уровень и формат по умолчанию — из LOG_LEVEL и LOG_FORMAT окружения
+    на момент вызова, то есть уже после load_dotenv().
+    """
+    level = level or os.getenv('LOG_LEVEL', LOG_LEVEL)
+    log_format = log_format or os.getenv('LOG_FORMAT', LOG_FORMAT)
+    logger.setLevel(level)
     stream_handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter("%(asctime)s - [%(levelname)s] %(message)s")
+    if log_format == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s - [%(levelname)s] %(message)s"
+        )
     stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
+    log_queue = queue.SimpleQueue()
+    listener = _Listener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(QueueHandler(log_queue))
     logger.debug('Logger enabled...')
+    return listener
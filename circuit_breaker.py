@@ -0,0 +1,100 @@
+import enum
+import logging
+import threading
+import time
+from http import HTTPStatus
+
+import metrics
+
+bot_logger = logging.getLogger('homework')
+
+
+def upstream_failed(status_code: int) -> bool:
+    """Ответ сервиса, который считается сбоем для выключателя (5xx, 429)."""
+    return (status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+            or status_code == HTTPStatus.TOO_MANY_REQUESTS)
+
+
+class CircuitState(enum.Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель для внешнего сервиса, общий для всех
+    опрашивающих потоков. После `failure_threshold` сбоев подряд цепь
+    размыкается, и запросы не отправляются `reset_timeout` секунд.
+    Затем пропускается ровно один пробный запрос: успех замыкает цепь,
+    сбой снова размыкает её.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 reset_timeout: float = 30, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    def _set_state(self, state: CircuitState) -> None:
+        if state is self._state:
+            return
+        self._state = state
+        metrics.CIRCUIT_TRANSITIONS.labels(self.name, state.value).inc()
+        if state is CircuitState.OPEN:
+            bot_logger.error(
+                'Circuit %s open for %ss after %d failures',
+                self.name, self.reset_timeout, self._failures
+            )
+        else:
+            bot_logger.info('Circuit %s %s', self.name, state.value)
+
+    def allow(self) -> bool:
+        """Можно ли сейчас отправить запрос."""
+        with self._lock:
+            if self._state is CircuitState.CLOSED:
+                return True
+            now = self._clock()
+            if self._state is CircuitState.OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    return False
+                self._set_state(CircuitState.HALF_OPEN)
+            elif (self._probe_at is not None
+                  and now - self._probe_at < self.reset_timeout):
+                return False  # probe in flight
+            self._probe_at = now
+            return True
+
+    def retry_in(self) -> float:
+        """Через сколько секунд будет пропущен пробный запрос."""
+        with self._lock:
+            if self._state is CircuitState.CLOSED:
+                return 0.0
+            return max(
+                0.0, self._opened_at + self.reset_timeout - self._clock()
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_at = None
+            self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if (self._state is CircuitState.HALF_OPEN
+                    or self._failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                self._probe_at = None
+                self._set_state(CircuitState.OPEN)
@@ -0,0 +1,81 @@
+"""
+Команды бота: /status и /history.
+Ответы строятся из последнего известного состояния подписок в памяти
+(см. Subscription.statuses/history) и журнала смен статусов в STATE_DB,
+запросов к API Практикума нет.
+"""
+import logging
+
+from subscribers import HISTORY_SIZE
+
+bot_logger = logging.getLogger('homework')
+
+NO_DATA = ('Нет данных о работах: статус ещё не менялся '
+           'с момента запуска бота.')
+NOT_SUBSCRIBED = 'Этот чат не подписан на уведомления о домашних работах.'
+
+
+def status_reply(registry, chat_id, verdicts: dict) -> str:
+    """Текущие статусы всех работ подписчиков чата."""
+    subscriptions = registry.by_chat(chat_id)
+    if not subscriptions:
+        return NOT_SUBSCRIBED
+    lines = [
+        f'"{name}": {verdicts.get(homework.status, homework.status)}'
+        for subscription in subscriptions
+        for name, homework in list(subscription.statuses.items())
+    ]
+    return '\n'.join(lines) or NO_DATA
+
+
+def history_reply(registry, chat_id, store=None) -> str:
+    """
+    Последние смены статусов работ подписчиков чата.
+    Со `store` — из журнала (переживает рестарт), иначе из памяти.
+    """
+    subscriptions = registry.by_chat(chat_id)
+    if not subscriptions:
+        return NOT_SUBSCRIBED
+    if store is not None:
+        events = store.last_events(chat_id, HISTORY_SIZE)
+    else:
+        events = sorted(
+            (homework for subscription in subscriptions
+             for homework in list(subscription.history)),
+            key=lambda homework: homework.date_updated or ''
+        )
+    lines = [
+        f'{homework.date_updated or "—"} "{homework.name}": {homework.status}'
+        for homework in events
+    ]
+    return '\n'.join(lines) or NO_DATA
+
+
+def start_commands(token, registry, sender, verdicts: dict, store=None):
+    """
+    Запуск приёма команд long polling'ом в фоновых потоках.
+    Ответы уходят через `sender` (обычно SendQueue), /history читает
+    журнал `store`, если он передан.
+    Возвращает Updater, его нужно остановить через `updater.stop()`.
+    """
+    from telegram.ext import CommandHandler, Updater
+
+    def reply(update, text):
+        sender.send_message(chat_id=update.effective_chat.id, text=text)
+
+    def status(update, context):
+        reply(update, status_reply(
+            registry, update.effective_chat.id, verdicts
+        ))
+
+    def history(update, context):
+        reply(update, history_reply(
+            registry, update.effective_chat.id, store
+        ))
+
+    updater = Updater(token=token)
+    updater.dispatcher.add_handler(CommandHandler('status', status))
+    updater.dispatcher.add_handler(CommandHandler('history', history))
+    updater.start_polling(drop_pending_updates=True)
+    bot_logger.info('Bot commands enabled: /status, /history')
+    return updater
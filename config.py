@@ -0,0 +1,254 @@
+"""
+Настройки бота: значения по умолчанию, переменные окружения (.env)
+и файл CONFIG_FILE в формате TOML или YAML (значения файла важнее).
+Ключи файла — имена полей Config, переменные окружения — те же имена
+в верхнем регистре. Файл можно перечитать на лету (SIGHUP или изменение
+файла), см. homework.reload_config.
+"""
+import dataclasses
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+
+from templates import (DEFAULT_LOCALE, MessageTemplates, TemplateError,
+                       build_locales)
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+try:
+    import yaml
+except ImportError:  # optional, only for YAML config files
+    yaml = None
+
+POLL_MODES = ('adaptive', 'waves')
+
+DEFAULT_STATUSES = {
+    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
+    'reviewing': 'Работа взята на проверку ревьюером.',
+    'rejected': 'Работа проверена: у ревьюера есть замечания.'
+}
+
+
+bot_logger = logging.getLogger('homework')
+
+
+class ConfigError(ValueError):
+    pass
+
+
+@dataclass
+class Config:
+    """Все настройки бота с умолчаниями."""
+
+    practicum_token: str = None
+    telegram_token: str = None
+    telegram_chat_id: str = None
+    # JSON-file with many subscribers, replaces PRACTICUM_TOKEN/CHAT_ID
+    subscribers_file: str = None
+    endpoint: str = (
+        'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+    )
+    homework_statuses: dict = field(
+        default_factory=lambda: dict(DEFAULT_STATUSES)
+    )
+    # message templates by locale over the built-in 'ru' and 'en' sets,
+    # {"en": {"message": "...{homework_name}...", "approved": "..."}}
+    templates: dict = field(default_factory=dict)
+    default_locale: str = DEFAULT_LOCALE
+    retry_time: float = 60
+    poll_min_interval: float = 20
+    poll_max_interval: float = 600
+    poll_workers: int = 8
+    # adaptive - per-subscriber timers, waves - fixed-rate bulk poll cycle
+    poll_mode: str = 'adaptive'
+    # subscribers per wave in 'waves' mode, 0 - poll_workers
+    wave_size: int = 0
+    state_db: str = 'bot_state.sqlite3'
+    commands_enabled: bool = False
+    metrics_port: int = 0
+    send_workers: int = 4
+    send_global_rate: float = 30
+    send_chat_rate: float = 1
+    send_coalesce_window: float = 1
+    # extra channels from SUBSCRIBERS_FILE: email via SMTP, webhooks
+    smtp_host: str = 'localhost'
+    smtp_port: int = 25
+    smtp_sender: str = 'homework-bot@localhost'
+    webhook_timeout: float = 10
+    breaker_threshold: int = 5
+    breaker_reset: float = 60
+    shutdown_timeout: float = 20
+    dedup_size: int = 100_000
+    dedup_ttl: int = 7 * 24 * 3600
+    dedup_persist: bool = True
+    # seconds between CONFIG_FILE/SUBSCRIBERS_FILE checks, 0 - SIGHUP only
+    config_watch_interval: float = 5
+
+    def problems(self) -> list:
+        """Ошибки в значениях настроек (пустой список — всё в порядке)."""
+        problems = []
+        if not 0 < self.poll_min_interval <= self.retry_time:
+            problems.append(
+                'Expected 0 < poll_min_interval <= retry_time'
+            )
+        if self.retry_time > self.poll_max_interval:
+            problems.append('Expected retry_time <= poll_max_interval')
+        for name in ('poll_workers', 'send_workers', 'send_global_rate',
+                     'send_chat_rate', 'breaker_threshold'):
+            value = getattr(self, name)
+            if value <= 0:
+                problems.append(f'{name} must be positive, got {value}')
+        if self.poll_mode not in POLL_MODES:
+            problems.append(
+                f'poll_mode must be one of {", ".join(POLL_MODES)}'
+            )
+        if self.wave_size < 0:
+            problems.append('wave_size must not be negative')
+        statuses = self.homework_statuses
+        if not statuses or not all(
+            isinstance(text, str) for text in statuses.values()
+        ):
+            problems.append('homework_statuses must map statuses to text')
+        else:
+            try:
+                self.message_templates()
+            except TemplateError as err:
+                problems.append(str(err))
+        return problems
+
+    def message_templates(self) -> MessageTemplates:
+        """Скомпилированные шаблоны уведомлений (TemplateError — ошибка)."""
+        return MessageTemplates(
+            build_locales(self.homework_statuses, self.templates),
+            self.homework_statuses, self.default_locale
+        )
+
+
+FIELDS = {item.name: item for item in dataclasses.fields(Config)}
+# TOMLDecodeError is a ValueError
+PARSE_ERRORS = (ValueError,) if yaml is None else (ValueError, yaml.YAMLError)
+
+
+def convert(name: str, value):
+    """Значение из окружения или файла к типу поля Config."""
+    kind = FIELDS[name].type
+    if value is None or isinstance(value, kind):
+        return value
+    try:
+        if kind is bool:
+            if str(value).lower() in ('1', 'true', 'yes', 'on'):
+                return True
+            if str(value).lower() in ('0', 'false', 'no', 'off', ''):
+                return False
+            raise ValueError(value)
+        if kind is dict:
+            return dict(json.loads(value) if isinstance(value, str)
+                        else value)
+        if kind is float and isinstance(value, int):
+            return float(value)
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ConfigError(f'{name}: {value!r} is not a valid {kind.__name__}')
+
+
+def read_file(path: str) -> dict:
+    """Настройки из TOML- или YAML-файла."""
+    if path.endswith(('.yaml', '.yml')):
+        if yaml is None:
+            raise ConfigError('Install PyYAML to use a YAML config file')
+        parse = yaml.safe_load
+    else:
+        if tomllib is None:
+            raise ConfigError('TOML config file needs Python 3.11+')
+        parse = tomllib.load
+    try:
+        with open(path, 'rb') as file:
+            data = parse(file)
+    except OSError as err:
+        raise ConfigError(f'Cannot read config file: {err}')
+    except PARSE_ERRORS as err:
+        raise ConfigError(f'Invalid config file {path}: {err}')
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ConfigError(f'Config file {path} must contain a mapping')
+    return data
+
+
+def load_config(path: str = None, environ=os.environ) -> Config:
+    """
+    Собрать настройки: умолчания, окружение, затем файл `path`.
+    Ошибки типов и неизвестные ключи файла — ConfigError.
+    """
+    values = {}
+    for name in FIELDS:
+        if name.upper() in environ:
+            values[name] = convert(name, environ[name.upper()])
+    if path:
+        for key, value in read_file(path).items():
+            name = key.lower()
+            if name not in FIELDS:
+                raise ConfigError(f'Unknown config key: {key}')
+            values[name] = convert(name, value)
+    return Config(**values)
+
+
+class FileWatcher:
+    """
+    Фоновая проверка mtime файлов настроек раз в `interval` секунд.
+    `paths()` возвращает текущие пути (они могут смениться при перезагрузке),
+    при изменении любого файла вызывается `on_change()`.
+    """
+
+    def __init__(self, paths, on_change, interval: float = 5):
+        self.paths = paths
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._seen = self._snapshot()
+        self._thread = None
+
+    def _snapshot(self) -> dict:
+        snapshot = {}
+        for path in self.paths():
+            if not path:
+                continue
+            try:
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                snapshot[path] = None
+        return snapshot
+
+    def check(self) -> bool:
+        """Сравнить файлы с прошлой проверкой; True — были изменения."""
+        snapshot = self._snapshot()
+        changed = [
+            path for path in snapshot.keys() | self._seen.keys()
+            if snapshot.get(path) != self._seen.get(path)
+        ]
+        self._seen = snapshot
+        if changed:
+            bot_logger.info('Config files changed: %s', ', '.join(changed))
+            self.on_change()
+        return bool(changed)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name='config-watcher', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def notification_key(chat_id, homework) -> str:
+    """Ключ уведомления: чат, id работы, статус и время обновления."""
+    return (f'{chat_id}:{homework.id}:{homework.status}:'
+            f'{homework.date_updated}')
+
+
+class NotificationDeduplicator:
+    """
+    Ограниченный LRU-кэш с TTL уже отправленных уведомлений.
+    Одна и та же смена статуса, пришедшая повторно (перекрытие `from_date`,
+    повтор запроса), не отправляется в Telegram второй раз.
+    С `store` ключи переживают рестарт (см. StateStore).
+    """
+
+    def __init__(self, max_size: int = 100_000, ttl: float = 7 * 24 * 3600,
+                 store=None, clock=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._store = store
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if store is not None:
+            for key, expires_at in store.load_notifications(
+                clock(), max_size
+            ):
+                self._entries[key] = expires_at
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_duplicate(self, key: str) -> bool:
+        """Было ли уведомление с таким ключом уже отправлено."""
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def remember(self, key: str) -> None:
+        """Запомнить отправленное уведомление."""
+        expires_at = self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = expires_at
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        if self._store is not None:
+            self._store.save_notification(key, expires_at)
@@ -0,0 +1,90 @@
+import enum
+import json
+
+
+class ErrorFlag(enum.Flag):
+    """
+    Ключи ошибок опроса (второй аргумент исключений бота).
+    Маска сохраняется в STATE_DB: новые флаги добавлять только в конец.
+    """
+
+    ENDPOINT_ERR = enum.auto()
+    RESPONSE_NOT_DICT = enum.auto()
+    RESPONSE_DONT_CONTAINS_ALL_KEYS = enum.auto()
+    HOMEWORKS_NOT_LIST = enum.auto()
+    HOMEWORK_NAME_NOT_FOUND = enum.auto()
+    HOMEWORK_STATUS_NOT_FOUND = enum.auto()
+    CURRENT_DATE_NOT_INT = enum.auto()
+    UNEXPECT_HOMEWORK_STATUS = enum.auto()
+    RESPONSE_NOT_JSON = enum.auto()
+    HOMEWORK_NOT_DICT = enum.auto()
+
+
+NO_ERRORS = ErrorFlag(0)
+
+
+def error_key(err):
+    """
+    Ключ ErrorFlag из аргументов исключения бота (сообщение, ключ).
+    None — у исключения нет такого ключа (например, обычный KeyError).
+    """
+    args = getattr(err, 'args', ())
+    if len(args) == 2 and args[1] in ErrorFlag.__members__:
+        return args[1]
+    return None
+
+
+class ErrorState:
+    """
+    Ошибки подписчика, о которых уже отправлено уведомление.
+    Битовая маска ErrorFlag: состояние меняется только при смене флага,
+    успешный опрос без ошибок ничего не записывает.
+    """
+
+    __slots__ = ('flags',)
+
+    def __init__(self, flags: ErrorFlag = NO_ERRORS):
+        self.flags = flags
+
+    def __bool__(self) -> bool:
+        return bool(self.flags)
+
+    def __contains__(self, key: str) -> bool:
+        return bool(self.flags & ErrorFlag[key])
+
+    def __int__(self) -> int:
+        return self.flags.value
+
+    def __repr__(self) -> str:
+        return f'ErrorState({self.keys()})'
+
+    def keys(self) -> list:
+        return [flag.name for flag in ErrorFlag if flag in self.flags]
+
+    def mark(self, key: str) -> bool:
+        """Отметить ошибку. True, если флаг был снят (нужно уведомление)."""
+        flag = ErrorFlag[key]
+        if self.flags & flag:
+            return False
+        self.flags |= flag
+        return True
+
+    def clear(self, key: str = None) -> None:
+        """Снять флаг ошибки `key` либо все флаги."""
+        if not self.flags:
+            return
+        if key is None:
+            self.flags = NO_ERRORS
+        else:
+            self.flags &= ~ErrorFlag[key]
+
+    @classmethod
+    def load(cls, value) -> 'ErrorState':
+        """Состояние из чекпоинта: маска либо прежний JSON-словарь."""
+        if isinstance(value, str) and value.startswith('{'):
+            flags = NO_ERRORS
+            for key, sent in json.loads(value).items():
+                if sent and key in ErrorFlag.__members__:
+                    flags |= ErrorFlag[key]
+            return cls(flags)
+        return cls(ErrorFlag(int(value)))
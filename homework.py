@@ -1,54 +1,148 @@
+import argparse
 import logging
 import os
+import random
+import signal
+import sqlite3
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from http import HTTPStatus
 
 import requests
 from dotenv import load_dotenv
-from telegram import Bot, TelegramError
 
+import metrics
+import report
+from api_client import (PracticumClient, body_hash, conditional_headers,
+                        remember_validators)
 from bot_logger import logger_config
+from circuit_breaker import CircuitBreaker, upstream_failed
+from commands import start_commands
+from config import Config, ConfigError, FileWatcher, load_config
+from dedup import NotificationDeduplicator, notification_key
+from error_state import ErrorFlag, ErrorState, error_key
 from exceptions import (ApiResponseNotCorrect, NotifiableError,
                         PracticumApiErr, TelegramSendErr, UndefinedHWStatus)
+from notifiers import (EmailNotifier, NotifierDispatcher, StdoutNotifier,
+                       TelegramNotifier, WebhookNotifier)
+from scheduler import AdaptiveInterval, PollOutcome, PollScheduler
+from state_store import StateStore
+from subscribers import SubscriberRegistry, Subscription
+from supervisor import HashRing, Supervisor
+from templates import TemplateError
+from validation import decode, validate_homework, validate_response
 
 load_dotenv()
 
-bot_logger = logging.getLogger(__name__)
+bot_logger = logging.getLogger('homework')
+
+# .env plus optional TOML/YAML file, see config.Config for every setting
+CONFIG_FILE = os.getenv('CONFIG_FILE')
+try:
+    CONFIG, CONFIG_ERROR = load_config(CONFIG_FILE), None
+except ConfigError as err:
+    # defaults keep the module importable, check_config() reports the error
+    CONFIG, CONFIG_ERROR = Config(), err
 
 # Get tokens from .env
-PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
-TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
-TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')  # me
+PRACTICUM_TOKEN = CONFIG.practicum_token
+TELEGRAM_TOKEN = CONFIG.telegram_token
+TELEGRAM_CHAT_ID = CONFIG.telegram_chat_id  # me
+# JSON-file with many subscribers, replaces PRACTICUM_TOKEN/TELEGRAM_CHAT_ID
+SUBSCRIBERS_FILE = CONFIG.subscribers_file
+POLL_WORKERS = CONFIG.poll_workers
+POLL_MODE = CONFIG.poll_mode
+WAVE_SIZE = CONFIG.wave_size or POLL_WORKERS
+# SQLite checkpoint of current_date and error flags
+STATE_DB = CONFIG.state_db
+# Answer /status and /history (only one process per bot token may do it)
+COMMANDS_ENABLED = CONFIG.commands_enabled
+# Prometheus /metrics exporter port, 0 - disabled
+METRICS_PORT = CONFIG.metrics_port
+# Outbound Telegram queue: sender threads and rate limits (msg/s)
+SEND_WORKERS = CONFIG.send_workers
+SEND_GLOBAL_RATE = CONFIG.send_global_rate
+SEND_CHAT_RATE = CONFIG.send_chat_rate
+SEND_COALESCE_WINDOW = CONFIG.send_coalesce_window
+# Extra notification channels (email, webhook) of SUBSCRIBERS_FILE entries
+SMTP_HOST = CONFIG.smtp_host
+SMTP_PORT = CONFIG.smtp_port
+SMTP_SENDER = CONFIG.smtp_sender
+WEBHOOK_TIMEOUT = CONFIG.webhook_timeout
+# processes sharing the bot token (--workers), they split SEND_GLOBAL_RATE
+SHARDS = 1
+# circuit breaker: failures in a row to open, seconds before a probe
+BREAKER_THRESHOLD = CONFIG.breaker_threshold
+BREAKER_RESET = CONFIG.breaker_reset
+# seconds to flush queued messages after SIGTERM/SIGINT
+SHUTDOWN_TIMEOUT = CONFIG.shutdown_timeout
+SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+# Skip repeated (homework id, status, date_updated) notifications
+DEDUP_SIZE = CONFIG.dedup_size
+DEDUP_TTL = CONFIG.dedup_ttl
+DEDUP_PERSIST = CONFIG.dedup_persist
 
-RETRY_TIME = 60
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+RETRY_TIME = CONFIG.retry_time
+# Adaptive polling: fast while 'reviewing', backoff up to max when idle
+POLL_MIN_INTERVAL = CONFIG.poll_min_interval
+POLL_MAX_INTERVAL = CONFIG.poll_max_interval
+API_TIMEOUT = (3.05, 10)  # connect, read
+ENDPOINT = CONFIG.endpoint
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
-HOMEWORK_STATUSES = {
-    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
-    'reviewing': 'Работа взята на проверку ревьюером.',
-    'rejected': 'Работа проверена: у ревьюера есть замечания.'
-}
+HOMEWORK_STATUSES = dict(CONFIG.homework_statuses)
+try:
+    # compiled per (locale, status), 'ru' verdicts are HOMEWORK_STATUSES
+    TEMPLATES = CONFIG.message_templates()
+except TemplateError:
+    TEMPLATES = None  # reported by check_config()
+
+# Pooled keep-alive client, created in main(); plain requests.get if None
+API_CLIENT = None
+# ETag/Last-Modified of the last get_api_answer response
+VALIDATORS = {}
+# shared by all pollers of this process
+PRACTICUM_BREAKER = CircuitBreaker(
+    'practicum', BREAKER_THRESHOLD, BREAKER_RESET
+)
+
+# error notifications sent to TELEGRAM_CHAT_ID by the single-user functions
+# (check_response, parse_status); subscribers keep their own ErrorState
+ERROR_STATE = ErrorState()
+
 
-ERRORS = {
-    # errors and flag 'need send notification about error in TG'
-    'ENDPOINT_ERR': False,
-    'RESPONSE_NOT_DICT': False,
-    'RESPONSE_DONT_CONTAINS_ALL_KEYS': False,
-    'HOMEWORKS_NOT_LIST': False,
-    'HOMEWORK_NAME_NOT_FOUND': False,
-    'HOMEWORK_STATUS_NOT_FOUND': False,
-    'CURRENT_DATE_NOT_INT': False,
-    'UNEXPECT_HOMEWORK_STATUS': False,
+# Pre-bound metric children: no lookups or allocations per poll
+POLL_COUNTERS = {
+    outcome: metrics.POLLS.labels(outcome.value) for outcome in PollOutcome
 }
+for err_flag in ErrorFlag:
+    metrics.API_ERRORS.labels(err_flag.name)
+API_NOT_MODIFIED = metrics.API_CACHE.labels('not_modified')
+API_SAME_BODY = metrics.API_CACHE.labels('same_body')
 
 
 def send_message(bot, message) -> None:
     """Отправка сообщения в чат Telegram."""
+    send_message_to(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_message_to(bot, chat_id, message, on_sent=None) -> None:
+    """
+    Отправка сообщения в заданный чат Telegram.
+    `on_sent()` вызывается после успешной отправки: у очередей
+    (SendQueue, NotifierDispatcher) — их потоком после доставки,
+    у обычного бота — сразу.
+    """
+    from telegram import TelegramError  # heavy, loaded after startup checks
     try:
-        bot_logger.debug(f'Send message: {message}')
+        bot_logger.debug('Send message to %s: %s', chat_id, message)
+        if getattr(bot, 'queued', False):
+            bot.send_message(chat_id=chat_id, text=message, on_sent=on_sent)
+            return
         bot.send_message(
-            chat_id=TELEGRAM_CHAT_ID,
+            chat_id=chat_id,
             text=message
         )
     except TelegramError as err:
@@ -56,6 +150,8 @@ def send_message(bot, message) -> None:
             (f'{type(err).__name__}: {err}. '
              f'Не удалось отправить сообщение в Telegram-чат!')
         )
+    if on_sent is not None:
+        on_sent()
 
 
 def get_api_answer(current_timestamp) -> dict:
@@ -63,17 +159,58 @@ def get_api_answer(current_timestamp) -> dict:
     Запрос данных об изменениях статуса домашней работы.
     Возращает словарь с ключами 'current_date' и 'homeworks'.
     """
+    response = api_request(
+        conditional_headers(HEADERS, VALIDATORS), current_timestamp
+    )
+    ERROR_STATE.clear('ENDPOINT_ERR')
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        return {'homeworks': [], 'current_date': current_timestamp}
+    remember_validators(response, VALIDATORS)
+    data = response.json()
+    if bot_logger.isEnabledFor(logging.DEBUG):
+        bot_logger.debug('RESPONSE JSON: %s', data)
+    return data
+
+
+def api_request(headers, current_timestamp):
+    """
+    Запрос статусов домашних работ с заданными заголовками авторизации.
+    Возвращает HTTP-ответ со статусом 200 или 304 (условный запрос),
+    тело не декодируется.
+    """
     timestamp = current_timestamp or int(time.time())
     params = {'from_date': timestamp}
-    response = requests.get(ENDPOINT, headers=HEADERS, params=params)
-    if response.status_code != HTTPStatus.OK:
+    http = API_CLIENT or requests
+    if not PRACTICUM_BREAKER.allow():
+        raise PracticumApiErr(circuit_open_message(), 'ENDPOINT_ERR')
+    started = time.perf_counter()
+    try:
+        response = http.get(
+            ENDPOINT, headers=headers, params=params, timeout=API_TIMEOUT
+        )
+    except requests.RequestException as err:
+        PRACTICUM_BREAKER.record_failure()
+        raise PracticumApiErr(
+            f'Нет ответа от сервиса Практикум.Домашка. {err}', 'ENDPOINT_ERR'
+        )
+    finally:
+        metrics.API_LATENCY.observe(time.perf_counter() - started)
+    if upstream_failed(response.status_code):
+        PRACTICUM_BREAKER.record_failure()
+    else:
+        PRACTICUM_BREAKER.record_success()
+    if response.status_code not in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
         err_message = (f'Нет ответа от сервиса Практикум.Домашка. '
                        f'Ошибка {response.status_code}!')
         raise PracticumApiErr(err_message, 'ENDPOINT_ERR')
     bot_logger.info('GET data from Practicum API done!')
-    bot_logger.debug(f'RESPONSE JSON: {response.json()}')
-    ERRORS['ENDPOINT_ERR'] = False
-    return response.json()
+    return response
+
+
+def circuit_open_message() -> str:
+    """Текст ошибки, пока запросы к API приостановлены выключателем."""
+    return (f'Сервис Практикум.Домашка недоступен, запросы приостановлены '
+            f'на {PRACTICUM_BREAKER.retry_in():.0f} с.')
 
 
 def check_response(response) -> list:
@@ -88,28 +225,28 @@ def check_response(response) -> list:
             'По API Практикум.Домашка ожидаем словарь!',
             'RESPONSE_NOT_DICT'
         )
-    ERRORS['RESPONSE_NOT_DICT'] = False
+    ERROR_STATE.clear('RESPONSE_NOT_DICT')
 
     if 'current_date' not in response or 'homeworks' not in response:
         raise ApiResponseNotCorrect(
             'В API-ответе ожидаем ключи "current_date" и "homeworks"!',
             'RESPONSE_DONT_CONTAINS_ALL_KEYS'
         )
-    ERRORS['RESPONSE_DONT_CONTAINS_ALL_KEYS'] = False
+    ERROR_STATE.clear('RESPONSE_DONT_CONTAINS_ALL_KEYS')
 
     if not isinstance(response.get('homeworks'), list):
         raise ApiResponseNotCorrect(
             'В API-ответе по ключу "homeworks" ожидаем список!',
             'HOMEWORKS_NOT_LIST'
         )
-    ERRORS['HOMEWORKS_NOT_LIST'] = False
+    ERROR_STATE.clear('HOMEWORKS_NOT_LIST')
 
     if not isinstance(response.get('current_date'), int):
         raise ApiResponseNotCorrect(
             'В API-ответе по ключу "current_date" ожидаем целое число!',
             'CURRENT_DATE_NOT_INT'
         )
-    ERRORS['CURRENT_DATE_NOT_INT'] = False
+    ERROR_STATE.clear('CURRENT_DATE_NOT_INT')
 
     homeworks = response.get('homeworks')
     if not homeworks:
@@ -119,92 +256,774 @@ def check_response(response) -> list:
 
 def parse_status(homework: dict) -> str:
     """Извлечение из объекта домашней работы информации о статусе."""
-    bot_logger.debug('Start parse_status...')
-    bot_logger.debug(homework)
+    bot_logger.debug('Start parse_status: %s', homework)
     if 'homework_name' not in homework:
         raise KeyError(
             'В информации о домашней работе нет названия!',
             'HOMEWORK_NAME_NOT_FOUND'
         )
-    ERRORS['HOMEWORK_NAME_NOT_FOUND'] = False
+    ERROR_STATE.clear('HOMEWORK_NAME_NOT_FOUND')
 
     if 'status' not in homework:
         raise ApiResponseNotCorrect(
             'В информации о домашней работе нет статуса работы!',
             'HOMEWORK_STATUS_NOT_FOUND'
         )
-    ERRORS['HOMEWORK_STATUS_NOT_FOUND'] = False
+    ERROR_STATE.clear('HOMEWORK_STATUS_NOT_FOUND')
 
-    homework_name = homework['homework_name']
     homework_status = homework['status']
     if homework_status not in HOMEWORK_STATUSES.keys():
         raise UndefinedHWStatus(
             f'Незадокументированный статус домашней работы: {homework_status}',
             'UNEXPECT_HOMEWORK_STATUS'
         )
-    verdict = HOMEWORK_STATUSES.get(homework_status)
-    ERRORS['UNEXPECT_HOMEWORK_STATUS'] = False
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    ERROR_STATE.clear('UNEXPECT_HOMEWORK_STATUS')
+    return status_message(validate_homework(homework, HOMEWORK_STATUSES))
+
+
+def status_message(homework, locale=None) -> str:
+    """Текст уведомления о новом статусе работы (Homework) по шаблону."""
+    return TEMPLATES.render(homework, locale)
 
 
 def check_tokens() -> bool:
     """Проверка всех требуемых токенов."""
+    if SUBSCRIBERS_FILE:
+        return bool(TELEGRAM_TOKEN)
     return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
 
 
-def errors_sender(bot, err_msg, err_key) -> None:
+def check_config() -> list:
+    """
+    Проверка токенов и настроек до запуска бота.
+    Возвращает список проблем; telegram при этом не импортируется.
+    """
+    if CONFIG_ERROR is not None:
+        return [f'Invalid configuration: {CONFIG_ERROR}']
+    problems = []
+    if not check_tokens():
+        problems.append(
+            '[!] Tokens not found! Please add your tokens in .env file!'
+        )
+    if SUBSCRIBERS_FILE and not os.path.isfile(SUBSCRIBERS_FILE):
+        problems.append(f'SUBSCRIBERS_FILE not found: {SUBSCRIBERS_FILE}')
+    return problems + CONFIG.problems()
+
+
+def stop_on_signals(stop) -> None:
+    """По SIGTERM/SIGINT вызвать `stop()` для штатного завершения."""
+    def handler(signum, frame):
+        bot_logger.info(
+            '%s received, shutting down', signal.Signals(signum).name
+        )
+        stop()
+
+    for signum in SHUTDOWN_SIGNALS:
+        signal.signal(signum, handler)
+
+
+def errors_sender(bot, err_msg, err_key, subscription=None) -> None:
     """
     Функция отправки сообщения в Telegram об ошибке уровня ERROR.
     Будет отправлено только одно сообщение, до момента исправления.
     """
-    if not ERRORS.get(err_key):
-        send_message(bot, err_msg)
-        ERRORS[err_key] = True
+    if subscription is None:
+        errors, chat_id = ERROR_STATE, TELEGRAM_CHAT_ID
+    else:
+        errors, chat_id = subscription.errors, subscription.chat_id
+    if err_key in errors:
+        return
+    try:
+        send_message_to(bot, chat_id, err_msg)
+    except TelegramSendErr as err:
+        bot_logger.error(err)
+        return
+    errors.mark(err_key)
+
+
+def load_registry(store=None, owns=None) -> SubscriberRegistry:
+    """
+    Реестр подписчиков: из SUBSCRIBERS_FILE либо из токенов .env.
+    Состояние подписчиков восстанавливается из чекпоинта `store`.
+    `owns(subscription)` отбирает подписчиков шарда этого процесса.
+    """
+    if SUBSCRIBERS_FILE:
+        registry = SubscriberRegistry.from_file(SUBSCRIBERS_FILE)
+    else:
+        registry = SubscriberRegistry(
+            [Subscription(token=PRACTICUM_TOKEN, chat_id=TELEGRAM_CHAT_ID)]
+        )
+    if owns is not None:
+        registry = SubscriberRegistry(
+            subscription for subscription in registry
+            if owns(subscription)
+        )
+    start_time = int(time.time())
+    for subscription in registry:
+        if store is not None and store.restore(subscription):
+            continue
+        subscription.current_date = subscription.current_date or start_time
+    return registry
+
+
+def make_bot(base_url=None):
+    """Бот Telegram за очередью отправки, пул соединений на все потоки."""
+    from telegram import Bot
+    from telegram.utils.request import Request
+
+    from send_queue import SendQueue
+
+    request = Request(con_pool_size=SEND_WORKERS + 4)
+    return SendQueue(
+        Bot(token=TELEGRAM_TOKEN, base_url=base_url, request=request),
+        workers=SEND_WORKERS, global_rate=SEND_GLOBAL_RATE / SHARDS,
+        chat_rate=SEND_CHAT_RATE, coalesce_window=SEND_COALESCE_WINDOW,
+        breaker=CircuitBreaker('telegram', BREAKER_THRESHOLD, BREAKER_RESET)
+    )
+
+
+def make_dispatcher(telegram, registry) -> NotifierDispatcher:
+    """Fan-out уведомлений: Telegram и каналы подписчиков из реестра."""
+    return NotifierDispatcher({
+        'telegram': TelegramNotifier(telegram),
+        'email': EmailNotifier(SMTP_HOST, SMTP_PORT, SMTP_SENDER),
+        'webhook': WebhookNotifier(WEBHOOK_TIMEOUT),
+        'stdout': StdoutNotifier(),
+    }, registry.routes)
+
+
+def make_deduplicator(store) -> NotificationDeduplicator:
+    """Кэш отправленных уведомлений, при DEDUP_PERSIST — с чекпоинтом."""
+    return NotificationDeduplicator(
+        DEDUP_SIZE, DEDUP_TTL, store=store if DEDUP_PERSIST else None
+    )
+
+
+def changed_body(response, subscription):
+    """
+    Хеш тела ответа, если его нужно разобрать.
+    None — сервер ответил 304 или вернул то же тело, что в прошлый раз.
+    """
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        API_NOT_MODIFIED.inc()
+        return None
+    remember_validators(response, subscription.validators)
+    digest = body_hash(response.content)
+    if digest == subscription.body_hash:
+        API_SAME_BODY.inc()
+        return None
+    return digest
+
+
+def fetch_statuses(subscription, from_date=None):
+    """
+    Запрос и проверка статусов работ подписчика, без уведомлений.
+    `from_date` по умолчанию — `current_date` подписчика.
+    Возвращает (current_date, [Homework, ...], хеш тела ответа)
+    либо None, если ответ не изменился (304 или то же тело).
+    """
+    if from_date is None:
+        from_date = subscription.current_date
+    headers = conditional_headers(
+        {'Authorization': f'OAuth {subscription.token}'},
+        subscription.validators
+    )
+    response = api_request(headers, from_date)
+    digest = changed_body(response, subscription)
+    if digest is None:
+        return None
+    data = decode(response.content)
+    if bot_logger.isEnabledFor(logging.DEBUG):
+        bot_logger.debug('RESPONSE JSON: %s', data)
+    current_date, homeworks = validate_response(data, HOMEWORK_STATUSES)
+    return current_date, homeworks, digest
+
+
+def delivered(chat_id, homework, key, dedup=None, events=None,
+              release=None):
+    """
+    Колбэк доставки уведомления: запомнить ключ и записать в журнал.
+    `release` отпускает метку чекпоинта (Subscription.hold_date).
+    """
+    def on_sent():
+        if dedup is not None:
+            dedup.remember(key)
+        if events is not None:
+            events.record_event(chat_id, homework)
+        if release is not None:
+            release(key)
+
+    return on_sent
+
+
+def notify_subscriber(bot, subscription, fetched, dedup=None,
+                      events=None) -> PollOutcome:
+    """
+    Уведомления подписчику по результату fetch_statuses.
+    Уже отправленные уведомления отсеиваются через `dedup`.
+    Ключ запоминается и смена статуса пишется в журнал `events`
+    (StateStore) только после доставки сообщения (см. send_message_to);
+    до тех пор чекпоинт хранит прежнюю метку (Subscription.hold_date).
+    """
+    if fetched is None:
+        subscription.errors.clear()
+        return PollOutcome.UNCHANGED
+    current_date, homeworks, digest = fetched
+    outbox = []
+    for homework in homeworks:
+        message = status_message(homework, subscription.locale)
+        subscription.track_status(homework)
+        key = notification_key(subscription.chat_id, homework)
+        if dedup is not None and dedup.is_duplicate(key):
+            bot_logger.debug('Duplicate notification skipped: %s', key)
+            continue
+        outbox.append((key, homework, message))
+    release = subscription.hold_date(key for key, *_ in outbox)
+    try:
+        for key, homework, message in outbox:
+            send_message_to(bot, subscription.chat_id, message, delivered(
+                subscription.chat_id, homework, key, dedup, events, release
+            ))
+    except Exception:
+        # current_date stays, the next poll fetches these changes again
+        for key, *_ in outbox:
+            release(key)
+        raise
+    subscription.current_date = current_date
+    subscription.body_hash = digest
+    subscription.errors.clear()
+    return PollOutcome.CHANGED if homeworks else PollOutcome.UNCHANGED
+
+
+def poll_failed(bot, subscription, err) -> PollOutcome:
+    """Ошибка опроса подписчика: лог, метрика и одно уведомление."""
+    if isinstance(err, TelegramSendErr):
+        bot_logger.error(err)  # opt.: exc_info=True
+        return PollOutcome.CHANGED
+    notifiable = isinstance(err, (NotifiableError, KeyError))
+    if notifiable and error_key(err) is not None:
+        err_name, (err_msg, err_key) = type(err).__name__, err.args
+        bot_logger.error('[%s] %s: %s', subscription.key, err_name, err_msg)
+        metrics.API_ERRORS.labels(err_key).inc()
+        errors_sender(bot, f'{err_name}: {err_msg}', err_key, subscription)
+    else:
+        bot_logger.error(f'Сбой в работе программы: {err}', exc_info=err)
+    return PollOutcome.ERROR
+
+
+def poll_subscriber(bot, subscription, dedup=None,
+                    events=None) -> PollOutcome:
+    """Один цикл опроса API и отправки уведомлений подписчику."""
+    try:
+        fetched = fetch_statuses(subscription)
+        return notify_subscriber(bot, subscription, fetched, dedup, events)
+    except Exception as err:
+        return poll_failed(bot, subscription, err)
+
+
+def checkpoint(store, subscription) -> None:
+    """
+    Чекпоинт состояния подписчика после опроса.
+    Сбой записи в STATE_DB только логируется: подписчик остаётся
+    в расписании, состояние запишется при следующем сбросе.
+    """
+    try:
+        store.save(subscription)
+    except sqlite3.Error as err:
+        bot_logger.error(f'State checkpoint failed: {err}')
 
 
-def main():
+def main(workers=1):
     """Основная логика работы бота."""
-    if check_tokens():
-        bot_logger.info('Tokens found!')
+    problems = check_config()
+    for problem in problems:
+        bot_logger.critical(problem)
+    if problems:
+        sys.exit(1)
+    bot_logger.info('Tokens found!')
+
+    if workers > 1:
+        if COMMANDS_ENABLED:
+            bot_logger.warning('Bot commands are disabled with --workers')
+        supervisor = Supervisor(
+            workers, serve_shard, shutdown_timeout=SHUTDOWN_TIMEOUT + 10
+        )
+        stop_on_signals(supervisor.stop)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(
+                signal.SIGHUP,
+                lambda signum, frame: supervisor.broadcast(signum)
+            )
+        supervisor.run()
     else:
-        bot_logger.critical(
-            '[!] Tokens not found! Please add your tokens in .env file!'
+        serve()
+
+
+def shard_owner(node, nodes):
+    """
+    Отбор подписчиков шарда `node`: по чату, а не по ключу подписки.
+    Подписчики одного группового чата попадают в один процесс, и его
+    очередь отправки соблюдает SEND_CHAT_RATE и склеивает их сообщения.
+    """
+    ring = HashRing(nodes)
+    return lambda subscription: (
+        ring.node_for(str(subscription.chat_id)) == node
+    )
+
+
+def serve_shard(node, nodes) -> None:
+    """Рабочий процесс супервизора: опрос подписчиков своего шарда."""
+    global SHARDS
+    # child processes exit without atexit hooks, stop the log listener here
+    listener = logger_config(bot_logger)
+    # Telegram limit is per bot token, split it between the workers
+    SHARDS = len(nodes)
+    index = int(node.rsplit('-', 1)[1])
+    bot_logger.info('%s of %d workers', node, len(nodes))
+    try:
+        serve(
+            owns=shard_owner(node, nodes),
+            metrics_port=METRICS_PORT and METRICS_PORT + index,
+            commands=False
         )
-        exit()
+    finally:
+        listener.stop()
 
-    bot = Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    bot_logger.info(f'Start time: {current_timestamp}')
 
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-            for homework in homeworks:
-                message = parse_status(homework)
-                send_message(bot, message)
-            current_timestamp = response.get('current_date')
-
-        except TelegramSendErr as err:
-            bot_logger.error(err)  # opt.: exc_info=True
-
-        except NotifiableError as err:
-            err_name, (err_msg, err_key) = type(err).__name__, err.args
-            bot_logger.error(f'{err_name}: {err_msg}')
-            errors_sender(bot, f'{err_name}: {err_msg}', err_key)
-
-        except KeyError as err:
-            err_name, (err_msg, err_key) = type(err).__name__, err.args
-            bot_logger.error(f'{err_name}: {err_msg}')
-            errors_sender(bot, f'{err_name}: {err_msg}', err_key)
+def serve(owns=None, metrics_port=METRICS_PORT,
+          commands=COMMANDS_ENABLED) -> None:
+    """
+    Опрос подписчиков в этом процессе: всех либо шарда `owns`.
+    Уведомления уходят в Telegram и каналы подписчиков (make_dispatcher).
+    По SIGTERM/SIGINT опрос останавливается, текущие опросы завершаются
+    без повторов запросов, очередь отправки досылается — всё вместе не
+    дольше SHUTDOWN_TIMEOUT секунд от сигнала; затем состояние
+    сохраняется в STATE_DB.
+    По SIGHUP или изменению файлов настройки перечитываются на лету.
+    """
+    global API_CLIENT
+    stop = threading.Event()
+    stopped = []  # moment of the signal, SHUTDOWN_TIMEOUT counts from it
+
+    def request_stop():
+        stopped.append(time.monotonic())
+        stop.set()
+
+    stop_on_signals(request_stop)
+    reload = threading.Event()
+    if hasattr(signal, 'SIGHUP'):  # not on Windows
+        signal.signal(signal.SIGHUP, lambda signum, frame: reload.set())
+    watcher = None
+    if CONFIG.config_watch_interval:
+        watcher = FileWatcher(
+            lambda: (CONFIG_FILE, SUBSCRIBERS_FILE), reload.set,
+            CONFIG.config_watch_interval
+        )
+        watcher.start()
+    API_CLIENT = PracticumClient(
+        pool_size=POLL_WORKERS, timeout=API_TIMEOUT, stop=stop
+    )
+    store = StateStore(STATE_DB)
+    store.start()
+    registry = load_registry(store, owns)
+    telegram = make_bot()
+    bot = make_dispatcher(telegram, registry)
+    bot.start()
+    dedup = make_deduplicator(store)
+    bot_logger.info(f'Subscribers: {len(registry)}')
+    if metrics_port:
+        metrics.REGISTRY.register(metrics.Gauge(
+            'homework_subscribers', 'Subscribers polled by this process',
+            lambda: len(registry)
+        ))
+        metrics.REGISTRY.register(metrics.Gauge(
+            'homework_send_queue_depth', 'Messages waiting in send queue',
+            bot.depth
+        ))
+        metrics.start_http_server(metrics_port)
+    updater = None
+    if commands:
+        updater = start_commands(
+            TELEGRAM_TOKEN, registry, telegram, HOMEWORK_STATUSES, store
+        )
+
+    loop = run_waves if POLL_MODE == 'waves' else run_polling
+    try:
+        loop(bot, registry, store, dedup, stop, reload, owns)
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        if updater is not None:
+            updater.stop()
+        left = SHUTDOWN_TIMEOUT
+        if stopped:
+            left = max(SHUTDOWN_TIMEOUT - (time.monotonic() - stopped[0]), 0)
+        if not bot.close(timeout=left):
+            bot_logger.warning('Shutdown timeout, send queue not drained')
+        bot_logger.info(f'Send queue: {telegram.stats()}')
+        bot_logger.info(f'Channels: {bot.stats()}')
+        store.close()
+        API_CLIENT.close()
+        bot_logger.info('Stopped')
+
+
+def run_polling(bot, registry, store, dedup, stop=None, reload=None,
+                owns=None) -> None:
+    """
+    Цикл планировщика опросов подписчиков.
+    Раздаёт опросы пулу потоков и после каждого планирует следующий.
+    После `reload.set()` перечитывает настройки (см. reload_config).
+    Работает до `stop.set()`.
+    """
+    scheduler = PollScheduler(RETRY_TIME)
+    scheduler.spread(registry.keys())
+    interval = AdaptiveInterval(
+        POLL_MIN_INTERVAL, RETRY_TIME, POLL_MAX_INTERVAL
+    )
+
+    def poll(subscription):
+        started = time.perf_counter()
+        outcome = poll_subscriber(bot, subscription, dedup, store)
+        metrics.POLL_DURATION.observe(time.perf_counter() - started)
+        POLL_COUNTERS[outcome].inc()
+        return outcome
+
+    def reschedule(future, subscription):
+        if future.cancelled():
+            return
+        outcome = poll_outcome(future)
+        checkpoint(store, subscription)
+        if registry.get(subscription.key) is not subscription:
+            return  # removed by a config reload while polling
+        delay = interval.next_delay(subscription, outcome)
+        scheduler.schedule(subscription.key, delay)
+
+    executor = ThreadPoolExecutor(max_workers=POLL_WORKERS)
+    in_flight = set()
+    try:
+        while stop is None or not stop.is_set():
+            if reload is not None and reload.is_set():
+                reload.clear()
+                reload_config(bot, registry, store, scheduler, interval, owns)
+            key = scheduler.wait_next(timeout=1.0)
+            subscription = registry.get(key)
+            if subscription is None:
+                continue
+            future = executor.submit(poll, subscription)
+            in_flight.add(future)
+            future.add_done_callback(in_flight.discard)
+            future.add_done_callback(
+                lambda done, sub=subscription: reschedule(done, sub)
+            )
+    finally:
+        # drop polls not started yet, wait for the ones in flight
+        executor.shutdown(wait=False, cancel_futures=True)
+        # set.copy() is atomic, pollers discard their futures concurrently
+        drain_polls(in_flight.copy(), SHUTDOWN_TIMEOUT)
+
+
+def poll_outcome(future) -> PollOutcome:
+    """
+    Итог завершённого опроса.
+    Упавший опрос считается ошибкой: подписчик остаётся в расписании.
+    """
+    try:
+        return future.result()
+    except Exception as err:
+        bot_logger.error(f'Сбой в работе программы: {err}', exc_info=err)
+        return PollOutcome.ERROR
+
+
+def drain_polls(futures, timeout: float) -> bool:
+    """
+    Дождаться опросов в работе не дольше `timeout` секунд.
+    Не успевшие опросы брошены: их подписчики не обновлены и будут
+    опрошены заново после рестарта.
+    """
+    _, pending = wait(futures, timeout=timeout)
+    if pending:
+        bot_logger.warning(
+            f'Shutdown timeout, {len(pending)} polls in flight abandoned'
+        )
+    return not pending
 
+
+def wait_wave(futures, stop=None) -> None:
+    """
+    Дождаться запросов волны.
+    После `stop.set()` ждать не дольше SHUTDOWN_TIMEOUT (drain_polls).
+    """
+    pending = futures
+    while pending and stop is not None and not stop.is_set():
+        _, pending = wait(pending, timeout=1.0)
+    if pending:
+        drain_polls(pending, None if stop is None else SHUTDOWN_TIMEOUT)
+
+
+def wave_timestamp(previous_cycle: float) -> int:
+    """
+    Общий from_date волн цикла.
+    Начало прошлого цикла, но не раньше RETRY_TIME плюс таймаут запроса
+    назад.
+    """
+    timeout = sum(API_TIMEOUT)
+    return int(max(previous_cycle, time.time() - RETRY_TIME - timeout))
+
+
+def wave_from_date(subscription, shared):
+    """from_date подписчика в волне: общий, отставший догоняет со своего."""
+    if shared is None or subscription.current_date is None:
+        return shared
+    return min(subscription.current_date, shared)
+
+
+def poll_wave(bot, wave, executor, dedup=None, events=None,
+              stop=None, wave_date=None) -> list:
+    """
+    Одна волна опроса подписчиков.
+    Запросы всех подписчиков волны идут параллельно с общим from_date
+    `wave_date` (см. wave_timestamp), без него — наименьшим `current_date`
+    подписчиков без ошибок: так волна читает одно окно изменений, а
+    подписчик с ошибкой его не сдвигает. Отставший подписчик запрашивает
+    изменения со своего `current_date`. Уже отправленное из окна отсеивает
+    `dedup`, смены статусов пишутся в журнал `events`. Уведомления
+    отправляются одним потоком в порядке волны.
+    Возвращает исходы опросов в порядке `wave`; None — запрос не
+    завершился до конца остановки (`stop`), подписчик не тронут.
+    """
+    shared = wave_date
+    if shared is None:
+        shared = min((
+            sub.current_date for sub in wave
+            if not sub.errors and sub.current_date is not None
+        ), default=None)
+    futures = [
+        executor.submit(fetch_statuses, sub, wave_from_date(sub, shared))
+        for sub in wave
+    ]
+    wait_wave(futures, stop)
+    outcomes = []
+    for subscription, future in zip(wave, futures):
+        if not future.done():
+            outcomes.append(None)
+            continue
+        try:
+            outcome = notify_subscriber(
+                bot, subscription, future.result(), dedup, events
+            )
         except Exception as err:
-            bot_logger.error(f'Сбой в работе программы: {err}', exc_info=True)
+            outcome = poll_failed(bot, subscription, err)
+        outcomes.append(outcome)
+    return outcomes
+
+
+def run_waves(bot, registry, store, dedup, stop=None, reload=None,
+              owns=None) -> None:
+    """
+    Цикл опроса волнами с постоянной частотой запросов.
+    Подписчики делятся на волны по WAVE_SIZE, волны равномерно
+    распределены по окну RETRY_TIME: каждый подписчик опрашивается раз
+    в RETRY_TIME секунд, задержка обнаружения изменения не больше
+    RETRY_TIME плюс таймаут запроса. Работает до `stop.set()`.
+    """
+    stop = stop or threading.Event()
+    next_wave = time.monotonic()
+    previous_cycle = None
+    executor = ThreadPoolExecutor(max_workers=POLL_WORKERS)
+    try:
+        while not stop.is_set():
+            if reload is not None and reload.is_set():
+                reload.clear()
+                reload_config(bot, registry, store, owns=owns)
+            keys = list(registry.keys())
+            waves = [
+                keys[start:start + WAVE_SIZE]
+                for start in range(0, len(keys), WAVE_SIZE)
+            ] or [[]]
+            step = RETRY_TIME / len(waves)
+            cycle_started = time.time()
+            wave_date = None
+            if previous_cycle is not None:
+                wave_date = wave_timestamp(previous_cycle)
+            for keys in waves:
+                if stop.wait(max(next_wave - time.monotonic(), 0)):
+                    break
+                # a slow wave delays the next one instead of a burst later
+                next_wave = max(next_wave, time.monotonic()) + step
+                wave = [
+                    sub for sub in map(registry.get, keys) if sub is not None
+                ]
+                started = time.perf_counter()
+                outcomes = poll_wave(
+                    bot, wave, executor, dedup, store, stop, wave_date
+                )
+                metrics.POLL_DURATION.observe(time.perf_counter() - started)
+                for subscription, outcome in zip(wave, outcomes):
+                    if outcome is None:
+                        continue
+                    POLL_COUNTERS[outcome].inc()
+                    checkpoint(store, subscription)
+            previous_cycle = cycle_started
+    finally:
+        # requests abandoned by wait_wave() must not delay the shutdown
+        executor.shutdown(wait=False, cancel_futures=True)
 
-        finally:
-            time.sleep(RETRY_TIME)
+
+def apply_config(config) -> None:
+    """
+    Применить перечитанные настройки к модулю.
+    Токен бота, пулы потоков, порты и STATE_DB меняются только рестартом.
+    """
+    global CONFIG, PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, SUBSCRIBERS_FILE
+    global HEADERS, ENDPOINT, RETRY_TIME, POLL_MIN_INTERVAL, POLL_MAX_INTERVAL
+    global SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_COALESCE_WINDOW, WAVE_SIZE
+    global TEMPLATES
+    CONFIG = config
+    PRACTICUM_TOKEN = config.practicum_token
+    TELEGRAM_CHAT_ID = config.telegram_chat_id
+    SUBSCRIBERS_FILE = config.subscribers_file
+    HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+    ENDPOINT = config.endpoint
+    RETRY_TIME = config.retry_time
+    POLL_MIN_INTERVAL = config.poll_min_interval
+    POLL_MAX_INTERVAL = config.poll_max_interval
+    SEND_GLOBAL_RATE = config.send_global_rate
+    SEND_CHAT_RATE = config.send_chat_rate
+    SEND_COALESCE_WINDOW = config.send_coalesce_window
+    WAVE_SIZE = config.wave_size or POLL_WORKERS
+    TEMPLATES = config.message_templates()
+    PRACTICUM_BREAKER.failure_threshold = config.breaker_threshold
+    PRACTICUM_BREAKER.reset_timeout = config.breaker_reset
+    # in place: validators and /status replies hold this dict
+    HOMEWORK_STATUSES.update(config.homework_statuses)
+    for status in set(HOMEWORK_STATUSES) - set(config.homework_statuses):
+        del HOMEWORK_STATUSES[status]
+
+
+def sync_registry(registry, fresh, store, scheduler) -> None:
+    """Добавить в работающий реестр новых подписчиков и убрать удалённых."""
+    for key in list(registry.keys()):
+        if fresh.get(key) is None:
+            registry.remove(key)
+            if scheduler is not None:
+                scheduler.discard(key)
+    added = [sub for sub in fresh if registry.get(sub.key) is None]
+    for subscription in fresh:
+        current = registry.get(subscription.key)
+        if current is not None:
+            current.channels = subscription.channels
+            current.locale = subscription.locale
+    for subscription in added:
+        if store is not None:
+            store.restore(subscription)
+        registry.add(subscription)
+        if scheduler is not None:
+            scheduler.schedule(
+                subscription.key, random.uniform(0, RETRY_TIME)
+            )
+    bot_logger.info(
+        'Subscribers: %d (%d added)', len(registry), len(added)
+    )
+
+
+def reload_config(bot, registry, store, scheduler=None, interval=None,
+                  owns=None) -> bool:
+    """
+    Перечитать CONFIG_FILE и SUBSCRIBERS_FILE на лету.
+    Настройки и подписчики применяются к работающему циклу опроса,
+    опросы в работе не прерываются. При ошибке остаются прежние
+    настройки, возвращается False.
+    """
+    try:
+        config = load_config(CONFIG_FILE)
+        problems = config.problems()
+    except ConfigError as err:
+        problems = [str(err)]
+    if not problems and not (
+        config.subscribers_file or config.practicum_token
+    ):
+        problems = ['No subscribers: set subscribers_file or tokens']
+    if problems:
+        for problem in problems:
+            bot_logger.error('Config not reloaded: %s', problem)
+        return False
+    previous = CONFIG
+    apply_config(config)
+    try:
+        fresh = load_registry(owns=owns)
+    except (OSError, ValueError, KeyError, TypeError) as err:
+        bot_logger.error('Config not reloaded: subscribers: %s', err)
+        apply_config(previous)
+        return False
+    if interval is not None:
+        interval.min_interval = POLL_MIN_INTERVAL
+        interval.base_interval = RETRY_TIME
+        interval.max_interval = POLL_MAX_INTERVAL
+    if scheduler is not None:
+        scheduler.interval = RETRY_TIME
+    bot.set_rates(
+        SEND_GLOBAL_RATE / SHARDS, SEND_CHAT_RATE, SEND_COALESCE_WINDOW
+    )
+    sync_registry(registry, fresh, store, scheduler)
+    bot_logger.info('Config reloaded')
+    return True
+
+
+def parse_args(argv=None):
+    """Аргументы командной строки."""
+    parser = argparse.ArgumentParser(description='Homework status bot')
+    parser.add_argument(
+        '--async', dest='use_async', action='store_true',
+        help='опрашивать API и отправлять сообщения в asyncio-режиме'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=int(os.getenv('WORKERS', 1)),
+        help='число рабочих процессов, подписчики делятся между ними'
+    )
+    commands = parser.add_subparsers(dest='command')
+    report_parser = commands.add_parser(
+        'report', help='время проверки работ по урокам и неделям из STATE_DB'
+    )
+    report_parser.add_argument(
+        '--format', dest='output_format', choices=('csv', 'json'),
+        default='csv'
+    )
+    report_parser.add_argument(
+        '--output', type=argparse.FileType('w', encoding='utf-8'),
+        default=sys.stdout, help='файл отчёта (по умолчанию stdout)'
+    )
+    args = parser.parse_args(argv)
+    if args.use_async and args.workers > 1:
+        parser.error('--async and --workers cannot be combined')
+    return args
+
+
+def review_report(output, output_format='csv') -> None:
+    """
+    Отчёт о времени проверки работ из журнала STATE_DB (см. report).
+    Без файла STATE_DB — выход с сообщением, пустая база не создаётся.
+    """
+    if not os.path.isfile(STATE_DB):
+        sys.exit(f'STATE_DB not found: {STATE_DB}')
+    store = StateStore(STATE_DB)
+    try:
+        groups = report.aggregate(store.iter_review_times())
+    finally:
+        store.close()
+    report.write_report(report.build_report(groups), output, output_format)
 
 
 if __name__ == '__main__':
-    logger_config(bot_logger)
-    main()
+    args = parse_args()
+    if args.command == 'report':
+        if CONFIG_ERROR is not None:
+            sys.exit(f'Invalid configuration: {CONFIG_ERROR}')
+        # no logger_config: logs go to stdout, the report may go there too
+        review_report(args.output, args.output_format)
+    elif args.use_async:
+        logger_config(bot_logger)
+        import async_bot
+        async_bot.main()
+    else:
+        logger_config(bot_logger)
+        main(args.workers)
@@ -0,0 +1,240 @@
+"""
+Метрики бота в формате Prometheus и HTTP-экспортёр `/metrics`.
+Обновление метрики — захват неконкурентной блокировки и сложение,
+без аллокаций: дочерние метрики с метками создаются заранее и кэшируются.
+"""
+import bisect
+import logging
+import threading
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+bot_logger = logging.getLogger('homework')
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class _CounterChild:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('_lock', '_bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric(ABC):
+    """Метрика с кэшем дочерних метрик по значениям меток."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    @abstractmethod
+    def _new_child(self):
+        """Новая дочерняя метрика для одного набора значений меток."""
+
+    def labels(self, *values):
+        """Дочерняя метрика для значений меток (создаётся один раз)."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _samples(self):
+        """Строки значений метрики в формате Prometheus."""
+
+    def expose(self) -> str:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Монотонный счётчик."""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            labels = _format_labels(self.labelnames, values)
+            yield f'{self.name}{labels} {child.value}'
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+            for bound, bucket in zip(bounds, counts):
+                cumulative += bucket
+                labels = _format_labels(
+                    self.labelnames + ('le',), values + (bound,)
+                )
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, values)
+            yield f'{self.name}_sum{labels} {total}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+class Gauge(_Metric):
+    """Значение, которое считывается функцией в момент экспорта."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, function=None):
+        self.function = function
+        super().__init__(name, documentation)
+
+    def _new_child(self):
+        return None
+
+    def _samples(self):
+        if self.function is not None:
+            yield f'{self.name} {self.function()}'
+
+
+class Registry:
+    """Набор метрик, отдаваемых экспортёром."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def expose(self) -> str:
+        return '\n'.join(metric.expose() for metric in self._metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+POLLS = REGISTRY.register(Counter(
+    'homework_polls_total', 'Practicum API polls by outcome', ('outcome',)
+))
+API_ERRORS = REGISTRY.register(Counter(
+    'homework_api_errors_total', 'Poll errors by ErrorFlag key', ('error',)
+))
+API_CACHE = REGISTRY.register(Counter(
+    'homework_api_cache_hits_total',
+    'Polls answered without parsing the body', ('reason',)
+))
+CIRCUIT_TRANSITIONS = REGISTRY.register(Counter(
+    'homework_circuit_transitions_total',
+    'Circuit breaker state changes', ('upstream', 'state')
+))
+MESSAGES = REGISTRY.register(Counter(
+    'homework_messages_total', 'Telegram messages by result', ('result',)
+))
+CHANNEL_MESSAGES = REGISTRY.register(Counter(
+    'homework_channel_messages_total',
+    'Notifications by delivery channel and result', ('channel', 'result')
+))
+API_LATENCY = REGISTRY.register(Histogram(
+    'homework_api_latency_seconds', 'get_api_answer request latency'
+))
+SEND_LATENCY = REGISTRY.register(Histogram(
+    'homework_send_latency_seconds', 'send_message latency'
+))
+POLL_DURATION = REGISTRY.register(Histogram(
+    'homework_poll_duration_seconds', 'Poll loop iteration duration'
+))
+
+MESSAGES_SENT = MESSAGES.labels('sent')
+MESSAGES_FAILED = MESSAGES.labels('failed')
+
+
+def start_http_server(port: int, registry: Registry = REGISTRY,
+                      host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Экспортёр `/metrics` в фоновом потоке."""
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.expose().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    thread = threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    )
+    thread.start()
+    bot_logger.info(f'Metrics exporter on :{port}/metrics')
+    return server
@@ -0,0 +1,60 @@
+import sys
+from dataclasses import dataclass
+from enum import Enum
+
+
+class HomeworkStatus(str, Enum):
+    """
+    Статус проверки работы. Наследник str: члены перечисления — общие
+    для всех записей объекты, равны строкам API и служат ключами
+    HOMEWORK_STATUSES.
+    """
+
+    APPROVED = 'approved'
+    REVIEWING = 'reviewing'
+    REJECTED = 'rejected'
+
+    def __str__(self):
+        return self.value
+
+    @classmethod
+    def parse(cls, status: str):
+        """
+        Член перечисления для известного статуса. Статус, добавленный
+        в homework_statuses настроек, остаётся интернированной строкой.
+        """
+        try:
+            return cls(status)
+        except ValueError:
+            return sys.intern(status)
+
+
+@dataclass(frozen=True)
+class Homework:
+    """
+    Компактная запись о домашней работе: только поля, нужные боту.
+    Создаётся один раз при проверке ответа API вместо хранения сырого dict.
+    """
+
+    __slots__ = ('id', 'name', 'status', 'date_updated', 'lesson_name',
+                 'reviewer_comment')
+
+    id: int
+    name: str
+    status: HomeworkStatus  # or str for statuses added in the config
+    date_updated: str
+    lesson_name: str
+    reviewer_comment: str
+
+    @classmethod
+    def build(cls, homework_id, name: str, status: str,
+              date_updated: str, lesson_name: str = None,
+              reviewer_comment: str = None) -> 'Homework':
+        if isinstance(name, str):
+            name = sys.intern(name)
+        if isinstance(lesson_name, str):
+            lesson_name = sys.intern(lesson_name)
+        return cls(
+            homework_id, name, HomeworkStatus.parse(status), date_updated,
+            lesson_name, reviewer_comment
+        )
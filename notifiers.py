@@ -0,0 +1,386 @@
+"""
+Каналы доставки уведомлений. У канала (Notifier) один основной метод:
+send_many — отправить пачку сообщений [(адрес, текст), ...]. Telegram —
+один из каналов, кроме него есть email через SMTP, вебхуки в стиле Slack
+и stdout. NotifierDispatcher раздаёт каждое сообщение во все каналы
+подписчика; у каждого канала своя очередь и поток, поэтому медленный
+канал не задерживает остальные.
+"""
+import logging
+import smtplib
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from email.message import EmailMessage
+
+import requests
+
+import metrics
+from exceptions import TelegramSendErr
+
+bot_logger = logging.getLogger('homework')
+
+# Channels a subscriber can add to Telegram in SUBSCRIBERS_FILE
+CHANNELS = ('email', 'webhook', 'stdout')
+SEPARATOR = '\n\n'
+EMAIL_SUBJECT = 'Статус домашней работы'
+
+
+def group_by_address(messages) -> dict:
+    """Тексты сообщений по адресам, в порядке поступления."""
+    grouped = {}
+    for address, text in messages:
+        grouped.setdefault(address, []).append(text)
+    return grouped
+
+
+def run_callbacks(callbacks) -> None:
+    """Вызвать колбэки доставки; их ошибки не останавливают отправку."""
+    for on_sent in callbacks:
+        try:
+            on_sent()
+        except Exception as err:
+            bot_logger.error(
+                f'Сбой обработки доставленного сообщения: {err}', exc_info=err
+            )
+
+
+class Notifier(ABC):
+    """
+    Канал доставки уведомлений.
+    Канал без send_many не создаётся (TypeError при создании).
+    """
+
+    # True: deliver only queues messages, the outcome is counted elsewhere
+    queued = False
+
+    @abstractmethod
+    def send_many(self, messages: list) -> int:
+        """
+        Отправить сообщения [(адрес, текст), ...].
+        Возвращает число недоставленных, ошибки канал логирует сам.
+        """
+
+    def deliver(self, batch: list) -> int:
+        """
+        Отправить пачку [(адрес, текст, on_sent), ...] через send_many.
+        Колбэки вызываются, только если доставлена вся пачка: канал
+        сообщает лишь число недоставленных.
+        """
+        failed = self.send_many(
+            [(address, text) for address, text, _ in batch]
+        )
+        if not failed:
+            run_callbacks(on_sent for *_, on_sent in batch if on_sent)
+        return failed
+
+    def start(self) -> None:
+        pass
+
+    def close(self, timeout: float = None) -> bool:
+        """Освободить ресурсы; True, если всё принятое доставлено."""
+        return True
+
+    def depth(self) -> int:
+        """Сообщения, принятые каналом, но ещё не доставленные."""
+        return 0
+
+    def set_rates(self, *args) -> None:
+        """Новые ограничения частоты отправки, если они есть у канала."""
+
+
+class TelegramNotifier(Notifier):
+    """Telegram: сообщения ставятся в SendQueue с её лимитами и повторами."""
+
+    queued = True
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def send_many(self, messages: list) -> int:
+        return self.deliver(
+            [(chat_id, text, None) for chat_id, text in messages]
+        )
+
+    def deliver(self, batch: list) -> int:
+        """Поставить в SendQueue; on_sent она вызовет после отправки."""
+        failed = 0
+        for chat_id, text, on_sent in batch:
+            try:
+                self.queue.send_message(
+                    chat_id=chat_id, text=text, on_sent=on_sent
+                )
+            except TelegramSendErr as err:
+                bot_logger.error(err)
+                failed += 1
+        return failed
+
+    def start(self) -> None:
+        self.queue.start()
+
+    def close(self, timeout: float = None) -> bool:
+        return self.queue.close(timeout=timeout)
+
+    def depth(self) -> int:
+        return self.queue.depth()
+
+    def set_rates(self, *args) -> None:
+        self.queue.set_rates(*args)
+
+
+class EmailNotifier(Notifier):
+    """
+    Email через SMTP-сервер (локальный релей или заглушка).
+    Одно соединение на пачку, сообщения на один адрес — одним письмом.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 25,
+                 sender: str = 'homework-bot@localhost',
+                 timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    def send_many(self, messages: list) -> int:
+        grouped = group_by_address(messages)
+        failed = 0
+        try:
+            with smtplib.SMTP(self.host, self.port,
+                              timeout=self.timeout) as smtp:
+                for address, texts in grouped.items():
+                    email = EmailMessage()
+                    email['Subject'] = EMAIL_SUBJECT
+                    email['From'] = self.sender
+                    email['To'] = address
+                    email.set_content(SEPARATOR.join(texts))
+                    try:
+                        smtp.send_message(email)
+                    except smtplib.SMTPException as err:
+                        bot_logger.error(f'Email to {address} failed: {err}')
+                        failed += len(texts)
+        except OSError as err:  # smtplib.SMTPException is an OSError
+            bot_logger.error(f'SMTP {self.host}:{self.port} failed: {err}')
+            return len(messages)
+        return failed
+
+
+class WebhookNotifier(Notifier):
+    """
+    Вебхуки в стиле Slack: POST {"text": ...} на URL подписчика.
+    Сообщения на один URL из пачки уходят одним запросом.
+    """
+
+    def __init__(self, timeout: float = 10, session=None):
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def send_many(self, messages: list) -> int:
+        failed = 0
+        for url, texts in group_by_address(messages).items():
+            try:
+                response = self.session.post(
+                    url, json={'text': SEPARATOR.join(texts)},
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+            except requests.RequestException as err:
+                bot_logger.error(f'Webhook {url} failed: {err}')
+                failed += len(texts)
+        return failed
+
+    def close(self, timeout: float = None) -> bool:
+        self.session.close()
+        return True
+
+
+class StdoutNotifier(Notifier):
+    """Вывод уведомлений в stdout (отладка, перенаправление в файл)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def send_many(self, messages: list) -> int:
+        stream = self.stream or sys.stdout
+        for address, text in messages:
+            stream.write(f'[{address}] {text}\n')
+        stream.flush()
+        return 0
+
+
+class _Channel:
+    """Очередь и поток доставки одного канала."""
+
+    def __init__(self, name: str, notifier: Notifier, batch_size: int,
+                 max_size: int):
+        self.name = name
+        self.notifier = notifier
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.stats = dict.fromkeys(('sent', 'queued', 'failed', 'dropped'), 0)
+        self._queue = deque()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._counters = {
+            result: metrics.CHANNEL_MESSAGES.labels(name, result)
+            for result in self.stats
+        }
+
+    def _count(self, result: str, amount: int) -> None:
+        if amount:
+            self.stats[result] += amount
+            self._counters[result].inc(amount)
+
+    def put(self, address, text, on_sent=None) -> None:
+        with self._cond:
+            if len(self._queue) >= self.max_size:
+                self._count('dropped', 1)
+                bot_logger.error(
+                    f'Очередь канала {self.name} переполнена, '
+                    f'сообщение для {address} отброшено!'
+                )
+                return
+            self._queue.append((address, text, on_sent))
+            self._cond.notify()
+
+    def depth(self) -> int:
+        with self._cond:
+            queued = len(self._queue) + self._in_flight
+        return queued + self.notifier.depth()
+
+    def _take(self) -> list:
+        with self._cond:
+            while not self._queue:
+                if not self._running:
+                    return []
+                self._cond.wait()
+            batch = [
+                self._queue.popleft()
+                for _ in range(min(self.batch_size, len(self._queue)))
+            ]
+            self._in_flight = len(batch)
+            return batch
+
+    def _work(self) -> None:
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            try:
+                failed = self.notifier.deliver(batch)
+            except Exception as err:
+                bot_logger.error(
+                    f'Канал {self.name}: сбой отправки: {err}', exc_info=err
+                )
+                failed = len(batch)
+            with self._cond:
+                self._count('failed', failed)
+                # a queued channel reports delivery in its own stats
+                accepted = 'queued' if self.notifier.queued else 'sent'
+                self._count(accepted, len(batch) - failed)
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def start(self) -> None:
+        self._running = True
+        self.notifier.start()
+        self._thread = threading.Thread(
+            target=self._work, name=f'notify-{self.name}', daemon=True
+        )
+        self._thread.start()
+
+    def drain(self, deadline: float = None) -> bool:
+        """Остановить приём и дождаться пустой очереди до `deadline`."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            while self._queue or self._in_flight:
+                if deadline is None:
+                    self._cond.wait(0.1)
+                    continue
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._cond.wait(min(left, 0.1))
+            drained = not self._queue and not self._in_flight
+            self._count('dropped', len(self._queue))
+            self._queue.clear()
+            self._cond.notify_all()
+        return drained
+
+    def close(self, timeout: float = None) -> bool:
+        drained = self.notifier.close(timeout=timeout)
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        return drained
+
+
+class NotifierDispatcher:
+    """
+    Fan-out уведомлений по каналам подписчика.
+    Повторяет интерфейс `Bot.send_message`: `routes(chat_id)` возвращает
+    пары (канал, адрес), сообщение ставится в очередь каждого канала.
+    Каналы отправляют пачками по `batch_size` в своих потоках.
+    `on_sent` вызывается после доставки по первому маршруту — основному
+    каналу подписчика (Telegram).
+    """
+
+    # send_message only enqueues, delivery is reported through on_sent
+    queued = True
+
+    def __init__(self, notifiers: dict, routes, batch_size: int = 100,
+                 max_size: int = 100_000):
+        self.notifiers = notifiers
+        self.routes = routes
+        self._channels = {
+            name: _Channel(name, notifier, batch_size, max_size)
+            for name, notifier in notifiers.items()
+        }
+
+    def send_message(self, chat_id=None, text=None, on_sent=None,
+                     **kwargs) -> None:
+        """Поставить сообщение в очереди всех каналов чата `chat_id`."""
+        for name, address in self.routes(chat_id):
+            channel = self._channels.get(name)
+            if channel is None:
+                bot_logger.error(f'Неизвестный канал уведомлений: {name}')
+                continue
+            channel.put(address, text, on_sent)
+            on_sent = None
+
+    def set_rates(self, *args) -> None:
+        for notifier in self.notifiers.values():
+            notifier.set_rates(*args)
+
+    def depth(self) -> int:
+        return sum(channel.depth() for channel in self._channels.values())
+
+    def stats(self) -> dict:
+        return {
+            name: dict(channel.stats)
+            for name, channel in self._channels.items()
+        }
+
+    def start(self) -> None:
+        for channel in self._channels.values():
+            channel.start()
+
+    def close(self, timeout: float = None) -> bool:
+        """
+        Досылать накопленное не дольше `timeout` секунд, затем закрыть
+        каналы. Возвращает True, если все очереди опустели.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        drained = True
+        for channel in self._channels.values():
+            drained = channel.drain(deadline) and drained
+        for channel in self._channels.values():
+            left = None
+            if deadline is not None:
+                left = max(deadline - time.monotonic(), 0)
+            drained = channel.close(timeout=left) and drained
+        return drained
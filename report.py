@@ -0,0 +1,65 @@
+"""
+Отчёт о времени проверки работ по журналу смен статусов в STATE_DB.
+Строки журнала читаются курсором потоком, длительности копятся
+компактными массивами по урокам и неделям, перцентили считаются по
+отсортированным массивам. API Практикума не запрашивается.
+"""
+import csv
+import json
+from array import array
+
+PERCENTILES = (50, 90, 99)
+# Lesson name for homeworks recorded before lesson_name was stored
+NO_LESSON = '—'
+
+
+def percentile(values, q: float) -> float:
+    """Перцентиль `q` отсортированной последовательности (интерполяция)."""
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (
+        position - lower
+    )
+
+
+def aggregate(review_times) -> dict:
+    """
+    Длительности проверок по группам за один проход.
+    `review_times` — строки StateStore.iter_review_times().
+    Возвращает {('lesson' | 'week', ключ): array секунд}.
+    """
+    groups = {}
+    for _, _, lesson_name, _, _, week, seconds in review_times:
+        for group in (('lesson', lesson_name or NO_LESSON), ('week', week)):
+            durations = groups.get(group)
+            if durations is None:
+                durations = groups[group] = array('d')
+            durations.append(seconds)
+    return groups
+
+
+def build_report(groups: dict) -> list:
+    """Строки отчёта: группа, ключ, число проверок и перцентили в часах."""
+    rows = []
+    for (group, key), durations in sorted(groups.items()):
+        durations = sorted(durations)
+        row = {'group': group, 'key': key, 'count': len(durations)}
+        for q in PERCENTILES:
+            row[f'p{q}_hours'] = round(percentile(durations, q) / 3600, 2)
+        rows.append(row)
+    return rows
+
+
+def write_report(rows: list, file, output_format: str = 'csv') -> None:
+    """Отчёт в `file` в формате CSV или JSON."""
+    if output_format == 'json':
+        json.dump(rows, file, ensure_ascii=False, indent=2)
+        file.write('\n')
+        return
+    fields = ['group', 'key', 'count'] + [
+        f'p{q}_hours' for q in PERCENTILES
+    ]
+    writer = csv.DictWriter(file, fieldnames=fields)
+    writer.writeheader()
+    writer.writerows(rows)
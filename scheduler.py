@@ -0,0 +1,122 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from enum import Enum
+
+
+class PollOutcome(Enum):
+    """Результат одного опроса подписчика."""
+
+    CHANGED = 'changed'
+    UNCHANGED = 'unchanged'
+    ERROR = 'error'
+
+
+class AdaptiveInterval:
+    """
+    Интервал до следующего опроса подписчика.
+    Пока работа на проверке (`reviewing`) опрашиваем часто (`min_interval`),
+    при пустых ответах и ошибках API интервал растёт экспоненциально
+    от `base_interval` до `max_interval`.
+    """
+
+    def __init__(self, min_interval: float, base_interval: float,
+                 max_interval: float, factor: float = 2.0,
+                 jitter: float = 0.1):
+        self.min_interval = min_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+
+    def _grow(self, streak: int) -> float:
+        return min(self.base_interval * self.factor ** streak,
+                   self.max_interval)
+
+    def next_delay(self, subscription, outcome: PollOutcome) -> float:
+        """Обновить счётчики подписки и вернуть паузу до опроса."""
+        if outcome is PollOutcome.ERROR:
+            subscription.error_streak += 1
+            delay = self._grow(subscription.error_streak)
+        else:
+            subscription.error_streak = 0
+            if outcome is PollOutcome.CHANGED:
+                subscription.idle_streak = 0
+            else:
+                subscription.idle_streak += 1
+            if subscription.reviewing:
+                delay = self.min_interval
+            else:
+                delay = self._grow(subscription.idle_streak)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class PollScheduler:
+    """
+    Планировщик опросов API.
+    Распределяет подписчиков равномерно по окну `interval` секунд,
+    чтобы запросы к Практикуму шли с постоянной частотой, а не пачкой.
+    """
+
+    def __init__(self, interval: float, clock=time.monotonic):
+        self.interval = interval
+        self._clock = clock
+        self._heap = []
+        self._due = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def spread(self, keys) -> None:
+        """Первичная раскладка ключей по окну опроса."""
+        keys = list(keys)
+        if not keys:
+            return
+        step = self.interval / len(keys)
+        for position, key in enumerate(keys):
+            self.schedule(key, position * step)
+
+    def schedule(self, key, delay: float) -> None:
+        """Поставить (или переставить) опрос `key` через `delay` секунд."""
+        due = self._clock() + delay
+        with self._cond:
+            self._due[key] = due
+            heapq.heappush(self._heap, (due, next(self._counter), key))
+            self._cond.notify()
+
+    def discard(self, key) -> None:
+        with self._cond:
+            self._due.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._due)
+
+    def wait_next(self, timeout: float = None):
+        """
+        Дождаться ближайшего по времени ключа и вернуть его.
+        Возвращает None, если за `timeout` ничего не подошло.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._cond:
+            while True:
+                now = self._clock()
+                while self._heap:
+                    due, _, key = self._heap[0]
+                    if self._due.get(key) != due:
+                        # stale entry: key was rescheduled or discarded
+                        heapq.heappop(self._heap)
+                        continue
+                    if due <= now:
+                        heapq.heappop(self._heap)
+                        del self._due[key]
+                        return key
+                    break
+                wait = self._heap[0][0] - now if self._heap else None
+                if deadline is not None:
+                    if now >= deadline:
+                        return None
+                    left = deadline - now
+                    wait = left if wait is None else min(wait, left)
+                self._cond.wait(wait)
@@ -0,0 +1,353 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from telegram.error import BadRequest, RetryAfter, TelegramError, Unauthorized
+
+import metrics
+from exceptions import TelegramSendErr
+from notifiers import run_callbacks
+
+bot_logger = logging.getLogger('homework')
+
+# Telegram Bot API limits: ~30 msg/s per bot, ~1 msg/s per chat
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+MESSAGE_LIMIT = 4096
+SEPARATOR = '\n\n'
+
+MESSAGES_DROPPED = metrics.MESSAGES.labels('dropped')
+
+
+class TokenBucket:
+    """Классический token bucket: `rate` токенов в секунду, до `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        """
+        Взять токен. Возвращает 0, если токен взят,
+        иначе — сколько секунд ждать до появления токена.
+        """
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> list:
+    """Разбить текст на части не длиннее `limit`, по возможности по строкам."""
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    parts.append(text)
+    return parts
+
+
+class _Batch:
+    """Сообщения в один чат, ожидающие отправки одним текстом."""
+
+    __slots__ = ('parts', 'length', 'callbacks')
+
+    def __init__(self, text: str, callbacks: list):
+        self.parts = [text]
+        self.length = len(text)
+        self.callbacks = callbacks
+
+    def fits(self, text: str, limit: int = MESSAGE_LIMIT) -> bool:
+        return self.length + len(SEPARATOR) + len(text) <= limit
+
+    def add(self, text: str, callbacks: list) -> None:
+        self.parts.append(text)
+        self.length += len(SEPARATOR) + len(text)
+        self.callbacks.extend(callbacks)
+
+    def text(self) -> str:
+        return SEPARATOR.join(self.parts)
+
+
+class SendQueue:
+    """
+    Очередь исходящих сообщений Telegram с ограничением частоты.
+    Повторяет интерфейс `Bot.send_message`, поэтому подставляется вместо
+    бота: вызов только ставит сообщение в очередь, отправляют рабочие потоки.
+    Частота ограничена глобально (token bucket) и по чатам (не чаще
+    `chat_rate` в секунду, порядок сообщений в чате сохраняется).
+    На RetryAfter чат ставится на паузу, сообщение не теряется.
+    С `breaker` (CircuitBreaker) при недоступности Telegram сообщения
+    ждут в очереди, пока выключатель не пропустит пробную отправку.
+    С `coalesce_window` сообщения в один чат, пришедшие за это время,
+    склеиваются в одно (с разбиением по лимиту Telegram в 4096 символов).
+    `on_sent` сообщения вызывается рабочим потоком только после успешной
+    отправки; для отброшенного сообщения он не вызывается.
+    """
+
+    # send_message only enqueues, delivery is reported through on_sent
+    queued = True
+
+    def __init__(self, bot, workers: int = 4, max_size: int = 100_000,
+                 global_rate: float = GLOBAL_RATE,
+                 chat_rate: float = CHAT_RATE, max_attempts: int = 5,
+                 coalesce_window: float = 0, breaker=None,
+                 clock=time.monotonic):
+        self.bot = bot
+        self.workers = workers
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.coalesce_window = coalesce_window
+        self.breaker = breaker
+        self._chat_interval = 1 / chat_rate
+        self._clock = clock
+        self._bucket = TokenBucket(global_rate, global_rate, clock=clock)
+        self._heap = []
+        self._counter = itertools.count()
+        self._next_slot = {}
+        self._paused_until = {}
+        self._batches = {}
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._threads = []
+        self._stats = dict.fromkeys(
+            ('queued', 'coalesced', 'sent', 'retried', 'rate_limited',
+             'dropped'), 0
+        )
+
+    def send_message(self, chat_id=None, text=None, on_sent=None,
+                     **kwargs) -> None:
+        """
+        Поставить сообщение в очередь (интерфейс Bot.send_message).
+        `on_sent()` вызывается после отправки последней части сообщения.
+        """
+        parts = split_message(text)
+        with self._cond:
+            for number, part in enumerate(parts, 1):
+                last = number == len(parts) and on_sent is not None
+                self._enqueue(chat_id, part, [on_sent] if last else [])
+            self._cond.notify()
+
+    def _enqueue(self, chat_id, text, callbacks) -> None:
+        batch = self._batches.get(chat_id)
+        if batch is not None and batch.fits(text):
+            batch.add(text, callbacks)
+            self._stats['queued'] += 1
+            self._stats['coalesced'] += 1
+            return
+        if len(self._heap) >= self.max_size:
+            MESSAGES_DROPPED.inc()
+            self._stats['dropped'] += 1
+            raise TelegramSendErr(
+                'Очередь отправки переполнена, сообщение отброшено!'
+            )
+        now = self._clock()
+        if len(self._next_slot) > self.max_size:
+            self._prune(now)
+        ready_at = max(
+            now + self.coalesce_window, self._next_slot.get(chat_id, now)
+        )
+        self._next_slot[chat_id] = ready_at + self._chat_interval
+        if self.coalesce_window:
+            text = self._batches[chat_id] = _Batch(text, callbacks)
+        heapq.heappush(self._heap, (
+            ready_at, next(self._counter), chat_id, text, 1, callbacks
+        ))
+        self._stats['queued'] += 1
+
+    def set_rates(self, global_rate: float, chat_rate: float,
+                  coalesce_window: float = None) -> None:
+        """Новые ограничения частоты (перечитанные настройки)."""
+        with self._cond:
+            self._bucket.rate = self._bucket.capacity = global_rate
+            self._chat_interval = 1 / chat_rate
+            if coalesce_window is not None:
+                self.coalesce_window = coalesce_window
+            self._cond.notify_all()
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._heap) + self._in_flight
+
+    def stats(self) -> dict:
+        with self._cond:
+            return dict(self._stats, depth=len(self._heap) + self._in_flight)
+
+    def _prune(self, now) -> None:
+        """Забыть чаты, у которых нет ограничений на будущее."""
+        self._next_slot = {
+            chat: slot for chat, slot in self._next_slot.items() if slot > now
+        }
+        self._paused_until = {
+            chat: until for chat, until in self._paused_until.items()
+            if until > now
+        }
+
+    def _push(self, ready_at, seq, chat_id, text, attempt,
+              callbacks) -> None:
+        heapq.heappush(
+            self._heap, (ready_at, seq, chat_id, text, attempt, callbacks)
+        )
+        self._cond.notify()
+
+    def _take(self):
+        """Дождаться сообщения, которое можно отправить прямо сейчас."""
+        with self._cond:
+            while True:
+                if not self._heap:
+                    if not self._running:
+                        return None
+                    self._cond.wait()
+                    continue
+                now = self._clock()
+                entry = self._heap[0]
+                ready_at, seq, chat_id, text, attempt, callbacks = entry
+                if ready_at > now:
+                    self._cond.wait(ready_at - now)
+                    continue
+                heapq.heappop(self._heap)
+                paused = self._paused_until.get(chat_id, 0)
+                if paused > now:
+                    self._push(paused, seq, chat_id, text, attempt, callbacks)
+                    continue
+                wait = self._bucket.reserve()
+                if wait:
+                    self._push(
+                        now + wait, seq, chat_id, text, attempt, callbacks
+                    )
+                    continue
+                if self.breaker is not None and not self.breaker.allow():
+                    wait = max(self.breaker.retry_in(), 1.0)
+                    self._push(
+                        now + wait, seq, chat_id, text, attempt, callbacks
+                    )
+                    continue
+                if isinstance(text, _Batch):
+                    if self._batches.get(chat_id) is text:
+                        del self._batches[chat_id]
+                    text = text.text()
+                self._in_flight += 1
+                return seq, chat_id, text, attempt, callbacks
+
+    def _retry(self, delay, seq, chat_id, text, attempt, callbacks,
+               err) -> None:
+        metrics.MESSAGES_FAILED.inc()
+        with self._cond:
+            if attempt >= self.max_attempts:
+                MESSAGES_DROPPED.inc()
+                self._stats['dropped'] += 1
+                bot_logger.error(
+                    f'{type(err).__name__}: {err}. Сообщение в чат {chat_id} '
+                    f'отброшено после {attempt} попыток!'
+                )
+                return
+            self._stats['retried'] += 1
+            self._push(
+                self._clock() + delay, seq, chat_id, text, attempt + 1,
+                callbacks
+            )
+
+    def _record(self, answered: bool) -> None:
+        """Учесть в выключателе, ответил ли Telegram на запрос."""
+        if self.breaker is None:
+            return
+        if answered:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def _deliver(self, seq, chat_id, text, attempt, callbacks) -> None:
+        started = time.perf_counter()
+        try:
+            self.bot.send_message(chat_id=chat_id, text=text)
+        except RetryAfter as err:
+            self._record(True)
+            with self._cond:
+                self._stats['rate_limited'] += 1
+                self._paused_until[chat_id] = self._clock() + err.retry_after
+            self._retry(
+                err.retry_after, seq, chat_id, text, attempt, callbacks, err
+            )
+        except (BadRequest, Unauthorized) as err:
+            self._record(True)
+            metrics.MESSAGES_FAILED.inc()
+            MESSAGES_DROPPED.inc()
+            with self._cond:
+                self._stats['dropped'] += 1
+            bot_logger.error(
+                f'{type(err).__name__}: {err}. '
+                f'Не удалось отправить сообщение в Telegram-чат {chat_id}!'
+            )
+        except TelegramError as err:
+            self._record(False)
+            self._retry(
+                2 ** attempt, seq, chat_id, text, attempt, callbacks, err
+            )
+        else:
+            self._record(True)
+            metrics.MESSAGES_SENT.inc()
+            with self._cond:
+                self._stats['sent'] += 1
+            run_callbacks(callbacks)
+        finally:
+            metrics.SEND_LATENCY.observe(time.perf_counter() - started)
+
+    def _work(self) -> None:
+        while True:
+            item = self._take()
+            if item is None:
+                return
+            try:
+                self._deliver(*item)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def start(self) -> None:
+        """Запустить рабочие потоки отправки."""
+        self._running = True
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f'send-{number}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self, timeout: float = None) -> bool:
+        """
+        Дождаться отправки накопленных сообщений (не дольше `timeout`)
+        и остановить потоки. Возвращает True, если очередь опустела.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._cond:
+            while self._heap or self._in_flight:
+                left = None if deadline is None else deadline - self._clock()
+                if left is not None and left <= 0:
+                    break
+                self._cond.wait(0.1 if left is None else min(left, 0.1))
+            drained = not self._heap and not self._in_flight
+            if self._heap:
+                MESSAGES_DROPPED.inc(len(self._heap))
+                self._stats['dropped'] += len(self._heap)
+            self._running = False
+            self._heap.clear()
+            self._batches.clear()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        return drained
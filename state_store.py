@@ -0,0 +1,258 @@
+import logging
+import sqlite3
+import threading
+import time
+
+from error_state import ErrorState
+from models import Homework
+
+bot_logger = logging.getLogger('homework')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS subscriptions (
+    key TEXT PRIMARY KEY,
+    from_date INTEGER NOT NULL,
+    errors TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notifications (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    chat_id TEXT NOT NULL,
+    homework_id TEXT NOT NULL,
+    homework_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    date_updated TEXT,
+    recorded_at REAL NOT NULL,
+    lesson_name TEXT
+);
+CREATE INDEX IF NOT EXISTS events_homework
+    ON events (chat_id, homework_id, date_updated);
+CREATE INDEX IF NOT EXISTS events_chat ON events (chat_id, date_updated);
+'''
+
+# Verdict statuses closing a review, see review_times()
+VERDICTS = ('approved', 'rejected')
+# Rows fetched per lock acquisition by iter_review_times()
+FETCH_SIZE = 1000
+
+
+class StateStore:
+    """
+    Чекпоинт состояния подписчиков в SQLite: `current_date` и флаги
+    отправленных уведомлений об ошибках переживают рестарт процесса.
+    Пока уведомления опроса не доставлены, сохраняется метка до него
+    (Subscription.checkpoint_date): после рестарта они придут снова.
+    Здесь же журнал смен статусов работ (таблица events, только вставки).
+    Записи копятся в памяти и сбрасываются одной транзакцией: по размеру
+    пачки `batch_size` или раз в `flush_interval` секунд.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500,
+                 flush_interval: float = 5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # timeout: worker processes of the supervisor share one file
+        self._conn = sqlite3.connect(
+            path, timeout=30, check_same_thread=False
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.commit()
+        self._pending = {}
+        self._pending_notifications = {}
+        self._pending_events = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def _migrate(self) -> None:
+        """Добавить в таблицы STATE_DB прежних версий новые колонки."""
+        columns = {
+            row[1] for row in self._conn.execute('PRAGMA table_info(events)')
+        }
+        if 'lesson_name' not in columns:
+            try:
+                self._conn.execute(
+                    'ALTER TABLE events ADD COLUMN lesson_name TEXT'
+                )
+            except sqlite3.OperationalError:
+                pass  # added by another worker process
+
+    def restore(self, subscription) -> bool:
+        """Восстановить состояние подписки из чекпоинта, если оно есть."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT from_date, errors FROM subscriptions WHERE key = ?',
+                (subscription.key,)
+            ).fetchone()
+        if row is None:
+            return False
+        subscription.current_date = row[0]
+        subscription.errors = ErrorState.load(row[1])
+        return True
+
+    def save(self, subscription) -> None:
+        """Отложенная запись состояния подписки (последняя версия на ключ)."""
+        with self._lock:
+            self._pending[subscription.key] = (
+                subscription.checkpoint_date, str(int(subscription.errors))
+            )
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def save_notification(self, key: str, expires_at: float) -> None:
+        """Отложенная запись ключа отправленного уведомления."""
+        with self._lock:
+            self._pending_notifications[key] = expires_at
+            full = len(self._pending_notifications) >= self.batch_size
+        if full:
+            self.flush()
+
+    def record_event(self, chat_id, homework) -> None:
+        """Отложенная запись смены статуса работы в журнал."""
+        with self._lock:
+            self._pending_events.append((
+                str(chat_id), str(homework.id), homework.name,
+                str(homework.status), homework.date_updated, time.time(),
+                homework.lesson_name
+            ))
+            full = len(self._pending_events) >= self.batch_size
+        if full:
+            self.flush()
+
+    def last_events(self, chat_id, limit: int = 20) -> list:
+        """Последние `limit` смен статусов работ чата, от старых к новым."""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT homework_id, homework_name, status, date_updated, '
+                'lesson_name FROM events WHERE chat_id = ? '
+                'ORDER BY date_updated DESC, id DESC LIMIT ?',
+                (str(chat_id), limit)
+            ).fetchall()
+        return [Homework.build(*row) for row in reversed(rows)]
+
+    def iter_review_times(self, chat_id=None):
+        """
+        Время от взятия работы на проверку до вердикта, в секундах.
+        Строки (chat_id, homework_name, lesson_name, вердикт,
+        date_updated вердикта, неделя, секунды) по вердиктам из журнала
+        в порядке записи; без chat_id — по всем чатам. Неделя — дата её
+        понедельника. Строки читаются курсором пачками по FETCH_SIZE.
+        """
+        self.flush()
+        query = (
+            'SELECT v.chat_id, v.homework_name, v.lesson_name, v.status, '
+            'v.date_updated, date(v.date_updated, \'weekday 0\', '
+            '\'-6 days\'), '
+            '(julianday(v.date_updated) - julianday(MAX(r.date_updated)))'
+            ' * 86400 '
+            'FROM events v JOIN events r '
+            'ON r.chat_id = v.chat_id AND r.homework_id = v.homework_id '
+            'AND r.status = \'reviewing\' '
+            'AND r.date_updated <= v.date_updated '
+            f'WHERE v.status IN ({", ".join("?" * len(VERDICTS))})'
+        )
+        params = list(VERDICTS)
+        if chat_id is not None:
+            query += ' AND v.chat_id = ?'
+            params.append(str(chat_id))
+        query += ' GROUP BY v.id ORDER BY v.id'
+        # own cursor: the shared connection stays usable between chunks
+        cursor = self._conn.cursor()
+        with self._lock:
+            cursor.execute(query, params)
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
+    def review_times(self, chat_id=None) -> list:
+        """Список iter_review_times() для чата `chat_id` либо всех чатов."""
+        return list(self.iter_review_times(chat_id))
+
+    def load_notifications(self, now: float, limit: int) -> list:
+        """
+        Непросроченные ключи уведомлений, от старых к новым.
+        Просроченные записи удаляются.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                'DELETE FROM notifications WHERE expires_at <= ?', (now,)
+            )
+            rows = self._conn.execute(
+                'SELECT key, expires_at FROM notifications '
+                'ORDER BY expires_at DESC LIMIT ?', (limit,)
+            ).fetchall()
+        return rows[::-1]
+
+    def flush(self) -> None:
+        """Записать накопленные изменения одной транзакцией."""
+        with self._lock:
+            if not (self._pending or self._pending_notifications
+                    or self._pending_events):
+                return
+            rows = [
+                (key, current_date, errors)
+                for key, (current_date, errors) in self._pending.items()
+            ]
+            notifications = list(self._pending_notifications.items())
+            events = self._pending_events
+            # buffers are cleared only after a successful commit: on
+            # sqlite3.Error the batch stays pending for the next flush
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO subscriptions '
+                    '(key, from_date, errors) VALUES (?, ?, ?)',
+                    rows
+                )
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO notifications '
+                    '(key, expires_at) VALUES (?, ?)',
+                    notifications
+                )
+                self._conn.executemany(
+                    'INSERT INTO events (chat_id, homework_id, homework_name,'
+                    ' status, date_updated, recorded_at, lesson_name) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    events
+                )
+            self._pending.clear()
+            self._pending_notifications.clear()
+            self._pending_events = []
+        bot_logger.debug(
+            'State checkpoint: %d subscriptions, %d notifications, '
+            '%d events', len(rows), len(notifications), len(events)
+        )
+
+    def start(self) -> None:
+        """Фоновый поток периодического сброса чекпоинта."""
+        self._flusher = threading.Thread(
+            target=self._run, name='state-flusher', daemon=True
+        )
+        self._flusher.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as err:
+                bot_logger.error(f'State checkpoint failed: {err}')
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=self.flush_interval)
+        self.flush()
+        self._conn.close()
@@ -0,0 +1,151 @@
+import hashlib
+import json
+from collections import deque
+from dataclasses import dataclass, field
+
+from error_state import ErrorState
+from notifiers import CHANNELS
+
+# Status changes kept per subscriber for the /history command
+HISTORY_SIZE = 20
+
+
+@dataclass
+class Subscription:
+    """Подписчик бота: токен Практикума, чат Telegram и метка опроса."""
+
+    token: str
+    chat_id: str
+    current_date: int = 0
+    errors: ErrorState = field(default_factory=ErrorState)
+    # names of homeworks currently in 'reviewing', polled more often
+    reviewing: set = field(default_factory=set)
+    idle_streak: int = 0
+    error_streak: int = 0
+    # last known state for bot commands: name -> Homework
+    statuses: dict = field(default_factory=dict)
+    history: deque = field(
+        default_factory=lambda: deque(maxlen=HISTORY_SIZE)
+    )
+    # conditional request cache: ETag/Last-Modified and last body hash
+    validators: dict = field(default_factory=dict)
+    body_hash: bytes = None
+    # extra delivery channels besides Telegram: name -> address
+    channels: dict = field(default_factory=dict)
+    # message templates locale, None - default_locale
+    locale: str = None
+    # polls with undelivered notifications: id -> (previous date, keys)
+    undelivered: dict = field(default_factory=dict)
+
+    def track_status(self, homework) -> None:
+        """Учесть новый статус работы: опрос, кэш состояния и история."""
+        if homework.status == 'reviewing':
+            self.reviewing.add(homework.name)
+        else:
+            self.reviewing.discard(homework.name)
+        self.statuses[homework.name] = homework
+        self.history.append(homework)
+
+    def hold_date(self, keys):
+        """
+        Удерживать нынешний `current_date` в чекпоинте до доставки `keys`.
+        Возвращает колбэк release(key) для каждого доставленного ключа.
+        """
+        pending = set(keys)
+        if pending:
+            self.undelivered[id(pending)] = (self.current_date, pending)
+
+        def release(key):
+            pending.discard(key)
+            if not pending:
+                self.undelivered.pop(id(pending), None)
+
+        return release
+
+    @property
+    def checkpoint_date(self) -> int:
+        """Метка для чекпоинта: раньше всех опросов с недоставленным."""
+        # list() of a dict view is atomic, releases run in sender threads
+        held = [date for date, _ in list(self.undelivered.values())]
+        return min([*held, self.current_date])
+
+    @property
+    def key(self) -> str:
+        """Ключ подписки без раскрытия токена (для логов и планировщика)."""
+        digest = hashlib.sha1(self.token.encode()).hexdigest()[:10]
+        return f'{self.chat_id}:{digest}'
+
+
+class SubscriberRegistry:
+    """Реестр подписчиков, опрашиваемых одним процессом."""
+
+    def __init__(self, subscriptions=()):
+        self._subscriptions = {}
+        self._by_chat = {}
+        for subscription in subscriptions:
+            self.add(subscription)
+
+    def add(self, subscription: Subscription) -> None:
+        self.remove(subscription.key)
+        self._subscriptions[subscription.key] = subscription
+        self._by_chat.setdefault(subscription.chat_id, []).append(
+            subscription
+        )
+
+    def remove(self, key: str) -> None:
+        subscription = self._subscriptions.pop(key, None)
+        if subscription is None:
+            return
+        chat = self._by_chat[subscription.chat_id]
+        chat.remove(subscription)
+        if not chat:
+            del self._by_chat[subscription.chat_id]
+
+    def get(self, key: str):
+        return self._subscriptions.get(key)
+
+    def by_chat(self, chat_id) -> list:
+        """Подписки, уведомления которых идут в чат `chat_id`."""
+        return self._by_chat.get(str(chat_id), [])
+
+    def routes(self, chat_id) -> list:
+        """Каналы доставки для чата: Telegram и каналы его подписчиков."""
+        routes = [('telegram', chat_id)]
+        for subscription in self.by_chat(chat_id):
+            for route in subscription.channels.items():
+                if route not in routes:
+                    routes.append(route)
+        return routes
+
+    def keys(self) -> list:
+        return list(self._subscriptions)
+
+    def __iter__(self):
+        return iter(list(self._subscriptions.values()))
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'SubscriberRegistry':
+        """
+        Загрузка подписчиков из JSON-файла вида
+        [{"token": "...", "chat_id": 123}, ...]. Необязательный ключ
+        "channels" — дополнительные каналы: {"email": "a@b.c", ...},
+        "locale" — язык уведомлений (например, "en").
+        """
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        subscriptions = []
+        for item in data:
+            channels = dict(item.get('channels', {}))
+            unknown = set(channels) - set(CHANNELS)
+            if unknown:
+                raise ValueError(
+                    f'Unknown channels: {", ".join(sorted(unknown))}'
+                )
+            subscriptions.append(Subscription(
+                token=item['token'], chat_id=str(item['chat_id']),
+                channels=channels, locale=item.get('locale')
+            ))
+        return cls(subscriptions)
@@ -0,0 +1,143 @@
+"""
+Режим супервизора: подписчики шардируются по N рабочим процессам
+консистентным хешированием, у каждого процесса свой цикл опроса и свой
+HTTP-пул. Упавшие процессы перезапускаются; процесс, падающий слишком
+часто, выводится из кольца, и его шарды распределяются между остальными.
+"""
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+
+bot_logger = logging.getLogger('homework')
+
+
+def stable_hash(value: str) -> int:
+    """Хеш, одинаковый во всех процессах (в отличие от hash())."""
+    return int(hashlib.md5(value.encode()).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """Консистентное хеширование ключей подписчиков по узлам-воркерам."""
+
+    def __init__(self, nodes, replicas: int = 100):
+        self.nodes = list(nodes)
+        self._ring = sorted(
+            (stable_hash(f'{node}#{replica}'), node)
+            for node in self.nodes
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._ring]
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, stable_hash(key))
+        return self._ring[index % len(self._ring)][1]
+
+
+class Supervisor:
+    """
+    Запускает `target(node, nodes)` в отдельном процессе на каждый узел
+    и следит за ними. Перезапуск — с экспоненциальной паузой; после
+    `max_restarts` падений за `window` секунд узел выводится из кольца.
+    При остановке воркеры получают SIGTERM и `shutdown_timeout` секунд
+    на штатное завершение, оставшиеся убиваются.
+    """
+
+    def __init__(self, workers: int, target, max_restarts: int = 5,
+                 window: float = 300, check_interval: float = 1.0,
+                 shutdown_timeout: float = 30):
+        self.nodes = [f'worker-{number}' for number in range(workers)]
+        self.target = target
+        self.max_restarts = max_restarts
+        self.window = window
+        self.check_interval = check_interval
+        self.shutdown_timeout = shutdown_timeout
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = {}
+        self._crashes = {node: [] for node in self.nodes}
+        self._restart_at = {}
+        self._running = False
+
+    def _start(self, node) -> None:
+        process = self._context.Process(
+            target=self.target, args=(node, list(self.nodes)),
+            name=node, daemon=False
+        )
+        process.start()
+        self._processes[node] = process
+        bot_logger.info('Started %s (pid %s)', node, process.pid)
+
+    def _stop_all(self) -> None:
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for node, process in self._processes.items():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                bot_logger.error('%s did not stop in time, killing', node)
+                process.kill()
+                process.join()
+        self._processes.clear()
+
+    def _rebalance(self, dead) -> None:
+        """Убрать узел из кольца и перезапустить остальных с новым кольцом."""
+        self.nodes.remove(dead)
+        bot_logger.error(
+            '%s crashed %d times in %ss, rebalancing shards over %d workers',
+            dead, self.max_restarts, self.window, len(self.nodes)
+        )
+        self._stop_all()
+        self._restart_at.clear()
+        for node in self.nodes:
+            self._start(node)
+
+    def _on_exit(self, node, process, now) -> None:
+        bot_logger.error('%s exited with code %s', node, process.exitcode)
+        del self._processes[node]
+        crashes = [
+            moment for moment in self._crashes[node]
+            if now - moment < self.window
+        ]
+        crashes.append(now)
+        self._crashes[node] = crashes
+        if len(crashes) >= self.max_restarts and len(self.nodes) > 1:
+            self._rebalance(node)
+            return
+        delay = min(2 ** len(crashes), 60)
+        self._restart_at[node] = now + delay
+
+    def check(self) -> None:
+        """Один проход наблюдения за процессами."""
+        now = time.monotonic()
+        for node, process in list(self._processes.items()):
+            # After a rebalance the snapshot holds replaced processes
+            if self._processes.get(node) is process and not process.is_alive():
+                self._on_exit(node, process, now)
+        for node, restart_at in list(self._restart_at.items()):
+            if restart_at <= now and node in self.nodes:
+                del self._restart_at[node]
+                self._start(node)
+
+    def run(self) -> None:
+        """Запуск воркеров и наблюдение до остановки (stop/Ctrl+C)."""
+        self._running = True
+        for node in self.nodes:
+            self._start(node)
+        try:
+            while self._running:
+                self.check()
+                time.sleep(self.check_interval)
+        finally:
+            self._stop_all()
+
+    def broadcast(self, signum) -> None:
+        """Переслать сигнал всем живым воркерам (SIGHUP — перечитать)."""
+        for process in self._processes.values():
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    def stop(self) -> None:
+        self._running = False
@@ -0,0 +1,139 @@
+"""
+Шаблоны уведомлений о смене статуса работы с локализацией.
+Шаблон — строка с полями {homework_name}, {lesson_name},
+{reviewer_comment}, {status} и {verdict}. Каждая пара (локаль, статус)
+компилируется один раз: вердикт и статус подставляются сразу, при отправке
+склеиваются готовые куски текста и поля работы, без разбора шаблона.
+Строка шаблона, все поля которой пусты (например, нет комментария
+ревьюера), в сообщение не попадает.
+"""
+from string import Formatter
+
+MESSAGE_FIELDS = ('homework_name', 'lesson_name', 'reviewer_comment')
+FIELDS = MESSAGE_FIELDS + ('status', 'verdict')
+DEFAULT_LOCALE = 'ru'
+# 'ru' verdicts are HOMEWORK_STATUSES, see build_locales()
+MESSAGES = {
+    'ru': 'Изменился статус проверки работы "{homework_name}". {verdict}',
+    'en': 'Homework "{homework_name}" status changed. {verdict}',
+}
+VERDICTS = {
+    'en': {
+        'approved': 'Reviewed: the reviewer liked everything. Hooray!',
+        'reviewing': 'The reviewer has started the review.',
+        'rejected': 'Reviewed: the reviewer has some remarks.',
+    },
+}
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class CompiledTemplate:
+    """
+    Шаблон, разобранный в строки из кусков (текст, поле или None).
+    Константы (статус, вердикт) уже подставлены в текст.
+    """
+
+    __slots__ = ('lines',)
+
+    def __init__(self, text: str, constants: dict):
+        self.lines = []
+        for line in text.split('\n'):
+            parts = []
+            try:
+                parsed = list(Formatter().parse(line))
+            except ValueError as err:
+                raise TemplateError(f'Invalid template {text!r}: {err}')
+            for literal, name, spec, conversion in parsed:
+                if name is not None and name not in FIELDS:
+                    raise TemplateError(
+                        f'Unknown template field {{{name}}} in {text!r}'
+                    )
+                if spec or conversion:
+                    raise TemplateError(
+                        f'Format specs are not supported in {text!r}'
+                    )
+                if name in constants:
+                    literal += constants[name]
+                    name = None
+                if parts and parts[-1][1] is None:
+                    literal = parts.pop()[0] + literal
+                parts.append((literal, name))
+            self.lines.append(tuple(parts))
+
+    def render(self, values: dict) -> str:
+        lines = []
+        for parts in self.lines:
+            text = []
+            filled = empty = False
+            for literal, name in parts:
+                text.append(literal)
+                if name is None:
+                    continue
+                value = values.get(name)
+                if value:
+                    filled = True
+                    text.append(str(value))
+                else:
+                    empty = True
+            if empty and not filled:
+                continue
+            lines.append(''.join(text))
+        return '\n'.join(lines)
+
+
+def build_locales(statuses: dict, overrides: dict = None) -> dict:
+    """
+    Наборы шаблонов по локалям: встроенные 'ru' (вердикты — `statuses`,
+    то есть HOMEWORK_STATUSES) и 'en', поверх них — `overrides` из настроек
+    вида {локаль: {"message": ..., статус: вердикт, ...}}.
+    """
+    locales = {
+        locale: {'message': message, **VERDICTS.get(locale, {})}
+        for locale, message in MESSAGES.items()
+    }
+    locales[DEFAULT_LOCALE].update(statuses)
+    for locale, values in (overrides or {}).items():
+        if not isinstance(values, dict):
+            raise TemplateError(f'Templates of {locale} must be a mapping')
+        locales.setdefault(locale, {}).update(values)
+    return locales
+
+
+class MessageTemplates:
+    """
+    Скомпилированные шаблоны по (локаль, статус).
+    Локаль без своего шаблона или вердикта берёт их из `default_locale`,
+    неизвестная локаль подписчика — `default_locale`.
+    """
+
+    def __init__(self, locales: dict, statuses,
+                 default_locale: str = DEFAULT_LOCALE):
+        if default_locale not in locales:
+            raise TemplateError(f'No templates for locale {default_locale}')
+        self.default_locale = default_locale
+        fallback = locales[default_locale]
+        self._compiled = {}
+        for locale, values in locales.items():
+            message = values.get('message', fallback.get('message'))
+            if not isinstance(message, str):
+                raise TemplateError(f'No message template for {locale}')
+            for status in statuses:
+                verdict = values.get(status, fallback.get(status, ''))
+                self._compiled[locale, status] = CompiledTemplate(
+                    message, {'status': status, 'verdict': str(verdict)}
+                )
+
+    def render(self, homework, locale: str = None) -> str:
+        """Текст уведомления о работе (Homework) для локали подписчика."""
+        status = str(homework.status)
+        template = self._compiled.get((locale, status))
+        if template is None:
+            template = self._compiled[self.default_locale, status]
+        return template.render({
+            'homework_name': homework.name,
+            'lesson_name': homework.lesson_name,
+            'reviewer_comment': homework.reviewer_comment,
+        })
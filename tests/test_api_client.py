@@ -0,0 +1,171 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import api_client
+import homework
+from scheduler import PollOutcome
+from subscribers import Subscription
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, headers=None, content=b''):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+
+    def close(self):
+        pass
+
+
+class TestPracticumClient:
+
+    def make_client(self, monkeypatch, answers, retries=2, stop=None):
+        client = api_client.PracticumClient(retries=retries, stop=stop)
+        calls = []
+
+        def fake_get(url, **kwargs):
+            calls.append(kwargs)
+            answer = answers.pop(0)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        monkeypatch.setattr(client.session, 'get', fake_get)
+        monkeypatch.setattr(api_client.time, 'sleep', lambda _: None)
+        return client, calls
+
+    def test_timeout_passed(self, monkeypatch):
+        client, calls = self.make_client(monkeypatch, [FakeResponse(200)])
+        client.get('https://example.com')
+        assert calls[0]['timeout'] == client.timeout
+
+    def test_retry_on_5xx(self, monkeypatch):
+        client, calls = self.make_client(
+            monkeypatch, [FakeResponse(503), FakeResponse(200)]
+        )
+        assert client.get('https://example.com').status_code == 200
+        assert len(calls) == 2
+
+    def test_gives_up_after_retries(self, monkeypatch):
+        client, calls = self.make_client(
+            monkeypatch, [FakeResponse(500)] * 3
+        )
+        assert client.get('https://example.com').status_code == 500
+        assert len(calls) == 3
+
+    def test_retry_on_connection_error(self, monkeypatch):
+        client, calls = self.make_client(
+            monkeypatch, [requests.ConnectionError('boom'), FakeResponse(200)]
+        )
+        assert client.get('https://example.com').status_code == 200
+
+    def test_no_retries_once_stopping(self, monkeypatch):
+        stop = threading.Event()
+        client, calls = self.make_client(
+            monkeypatch, [FakeResponse(503), FakeResponse(200)], stop=stop
+        )
+        stop.set()
+        assert client.get('https://example.com').status_code == 503
+        assert len(calls) == 1
+
+    def test_stop_interrupts_retry_pause(self, monkeypatch):
+        stop = threading.Event()
+        client, calls = self.make_client(
+            monkeypatch, [requests.ConnectionError('boom'), FakeResponse(200)],
+            stop=stop
+        )
+        monkeypatch.setattr(client, '_delay', lambda *args: 60)
+        threading.Timer(0.05, stop.set).start()
+        started = time.monotonic()
+        with pytest.raises(requests.ConnectionError):
+            client.get('https://example.com')
+        assert time.monotonic() - started < 5, (
+            'Пауза перед повтором прерывается остановкой'
+        )
+        assert len(calls) == 1
+
+    def test_retry_after_header(self):
+        client = api_client.PracticumClient(max_backoff=5)
+        response = FakeResponse(429, {'Retry-After': '3'})
+        assert client._delay(0, response) == 3
+        response = FakeResponse(429, {'Retry-After': '30'})
+        assert client._delay(0, response) == 5
+
+
+class TestConditionalRequests:
+
+    def test_validators_roundtrip(self):
+        validators = {}
+        response = FakeResponse(200, {
+            'ETag': '"abc"', 'Last-Modified': 'Wed, 21 Oct 2026 07:28:00 GMT'
+        })
+        api_client.remember_validators(response, validators)
+        headers = api_client.conditional_headers(
+            {'Authorization': 'OAuth x'}, validators
+        )
+        assert headers == {
+            'Authorization': 'OAuth x',
+            'If-None-Match': '"abc"',
+            'If-Modified-Since': 'Wed, 21 Oct 2026 07:28:00 GMT',
+        }
+
+    def test_unchanged_responses_not_parsed(self, monkeypatch):
+        body = (b'{"homeworks": [{"homework_name": "hw", '
+                b'"status": "approved"}], "current_date": 100}')
+        answers = [
+            FakeResponse(200, {'ETag': '"v1"'}, body),
+            FakeResponse(200, {'ETag': '"v1"'}, body),
+            FakeResponse(304),
+        ]
+        calls = []
+
+        class Client:
+            def get(self, url, **kwargs):
+                calls.append(kwargs['headers'])
+                return answers.pop(0)
+
+        class Bot:
+            sent = []
+
+            def send_message(self, chat_id, text):
+                self.sent.append(text)
+
+        monkeypatch.setattr(homework, 'API_CLIENT', Client())
+        bot = Bot()
+        subscription = Subscription(token='t', chat_id=1, current_date=1)
+        outcomes = [
+            homework.poll_subscriber(bot, subscription) for _ in range(3)
+        ]
+        assert outcomes == [
+            PollOutcome.CHANGED, PollOutcome.UNCHANGED, PollOutcome.UNCHANGED
+        ]
+        assert len(bot.sent) == 1, (
+            'Повторное тело ответа и 304 не должны давать уведомлений'
+        )
+        assert 'If-None-Match' not in calls[0]
+        assert calls[2]['If-None-Match'] == '"v1"'
+        assert subscription.current_date == 100
+
+
+def test_open_circuit_skips_requests(monkeypatch):
+    breaker = homework.CircuitBreaker('practicum', failure_threshold=2)
+    monkeypatch.setattr(homework, 'PRACTICUM_BREAKER', breaker)
+    calls = []
+
+    class Client:
+        def get(self, url, **kwargs):
+            calls.append(url)
+            return FakeResponse(503)
+
+    monkeypatch.setattr(homework, 'API_CLIENT', Client())
+    for _ in range(5):
+        with pytest.raises(homework.PracticumApiErr) as err:
+            homework.api_request({}, 1)
+        assert err.value.args[1] == 'ENDPOINT_ERR'
+    assert len(calls) == 2, (
+        'При разомкнутом выключателе запросы к API не отправляются'
+    )
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import async_bot
+from dedup import NotificationDeduplicator
+from scheduler import PollOutcome
+from subscribers import Subscription
+
+
+class FakeResponse:
+
+    def __init__(self, status, data):
+        self.status = status
+        self.data = data
+
+    async def json(self, **kwargs):
+        return self.data
+
+    async def read(self):
+        return json.dumps(self.data).encode()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+
+    def __init__(self, api_status, api_data):
+        self.api_status = api_status
+        self.api_data = api_data
+        self.sent = []
+
+    def get(self, url, headers=None, params=None):
+        assert headers['Authorization'].startswith('OAuth ')
+        assert 'from_date' in params
+        return FakeResponse(self.api_status, self.api_data)
+
+    def post(self, url, json=None):
+        self.sent.append(json)
+        return FakeResponse(200, {'ok': True})
+
+
+class TestAsyncBot:
+
+    def poll(self, session, subscription):
+        return asyncio.run(async_bot.poll_subscriber(
+            session, asyncio.Semaphore(2), subscription
+        ))
+
+    def test_poll_sends_status(self):
+        session = FakeSession(200, {
+            'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+            'current_date': 100,
+        })
+        subscription = Subscription(token='t', chat_id='1', current_date=1)
+        self.poll(session, subscription)
+        assert len(session.sent) == 1
+        assert session.sent[0]['chat_id'] == '1'
+        assert session.sent[0]['text'].startswith(
+            'Изменился статус проверки работы "hw1"'
+        )
+        assert subscription.current_date == 100
+
+    def test_api_error_notified_once(self):
+        session = FakeSession(500, {})
+        subscription = Subscription(token='t', chat_id='1', current_date=1)
+        self.poll(session, subscription)
+        self.poll(session, subscription)
+        assert len(session.sent) == 1, (
+            'Сообщение об ошибке должно отправляться один раз'
+        )
+        assert subscription.current_date == 1
+
+    def test_plain_key_error_not_fatal(self, monkeypatch):
+        async def broken_parse(response):
+            raise KeyError('homework_name')
+
+        monkeypatch.setattr(async_bot, 'check_response', broken_parse)
+        session = FakeSession(200, {'homeworks': [], 'current_date': 100})
+        subscription = Subscription(token='t', chat_id='1', current_date=1)
+        assert self.poll(session, subscription) is PollOutcome.ERROR
+        assert not session.sent
+        assert subscription.current_date == 1
+
+    def test_partial_send_remembers_delivered(self):
+        class FlakySession(FakeSession):
+            def post(self, url, json=None):
+                if '"hw2"' in json['text']:
+                    return FakeResponse(400, {'ok': False})
+                return super().post(url, json)
+
+        session = FlakySession(200, {
+            'homeworks': [
+                {'homework_name': 'hw1', 'status': 'approved'},
+                {'homework_name': 'hw2', 'status': 'approved'},
+            ],
+            'current_date': 100,
+        })
+        subscription = Subscription(token='t', chat_id='1', current_date=1)
+        dedup = NotificationDeduplicator()
+        asyncio.run(async_bot.poll_subscriber(
+            session, asyncio.Semaphore(2), subscription, dedup
+        ))
+        assert len(session.sent) == 1
+        assert subscription.current_date == 1, (
+            'После сбоя отправки опрос должен повториться с той же даты'
+        )
+        asyncio.run(async_bot.poll_subscriber(
+            session, asyncio.Semaphore(2), subscription, dedup
+        ))
+        assert len(session.sent) == 1, (
+            'Доставленное уведомление не должно отправляться повторно'
+        )
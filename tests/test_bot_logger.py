@@ -0,0 +1,38 @@
+import json
+import logging
+
+from bot_logger import JsonFormatter, logger_config
+
+
+class TestBotLogger:
+
+    def test_json_formatter(self):
+        record = logging.LogRecord(
+            'homework', logging.INFO, __file__, 1, 'Polls: %d', (3,), None
+        )
+        data = json.loads(JsonFormatter().format(record))
+        assert data['level'] == 'INFO'
+        assert data['message'] == 'Polls: 3'
+
+    def test_queue_listener_writes_off_thread(self, capsys):
+        logger = logging.getLogger('test_bot_logger')
+        listener = logger_config(logger, level='INFO', log_format='text')
+        logger.debug('hidden')
+        logger.info('visible %s', 'message')
+        listener.stop()
+        out = capsys.readouterr().out
+        assert 'visible message' in out
+        assert 'hidden' not in out
+
+    def test_settings_read_on_config(self, monkeypatch, capsys):
+        monkeypatch.setenv('LOG_LEVEL', 'ERROR')
+        monkeypatch.setenv('LOG_FORMAT', 'json')
+        logger = logging.getLogger('test_bot_logger_env')
+        listener = logger_config(logger)
+        logger.info('hidden')
+        logger.error('visible')
+        listener.stop()
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line)['message'] for line in lines] == [
+            'visible'
+        ], 'LOG_LEVEL и LOG_FORMAT из .env читаются при настройке логгера'
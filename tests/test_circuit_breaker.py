@@ -0,0 +1,64 @@
+from circuit_breaker import CircuitBreaker, CircuitState, upstream_failed
+from utils import FakeClock
+
+
+class TestCircuitBreaker:
+
+    def make_breaker(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            'test', failure_threshold=3, reset_timeout=10, clock=clock
+        )
+        return breaker, clock
+
+    def test_opens_after_threshold(self):
+        breaker, _ = self.make_breaker()
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state is CircuitState.OPEN
+        assert not breaker.allow(), (
+            'Разомкнутый выключатель не должен пропускать запросы'
+        )
+        assert breaker.retry_in() == 10
+
+    def test_success_resets_failures(self):
+        breaker, _ = self.make_breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state is CircuitState.CLOSED
+
+    def test_single_probe_when_half_open(self):
+        breaker, clock = self.make_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now = 10
+        assert breaker.allow()
+        assert breaker.state is CircuitState.HALF_OPEN
+        assert not breaker.allow(), (
+            'В полуоткрытом состоянии допускается только один пробный запрос'
+        )
+        breaker.record_success()
+        assert breaker.state is CircuitState.CLOSED
+        assert breaker.allow()
+
+    def test_failed_probe_reopens(self):
+        breaker, clock = self.make_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now = 10
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state is CircuitState.OPEN
+        clock.now = 15
+        assert not breaker.allow()
+
+
+def test_upstream_failed():
+    assert upstream_failed(503)
+    assert upstream_failed(429)
+    assert not upstream_failed(200)
+    assert not upstream_failed(401)
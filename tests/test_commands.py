@@ -0,0 +1,54 @@
+from commands import NO_DATA, NOT_SUBSCRIBED, history_reply, status_reply
+from models import Homework
+from state_store import StateStore
+from subscribers import SubscriberRegistry, Subscription
+
+VERDICTS = {'approved': 'Ура!', 'reviewing': 'На проверке.'}
+
+
+class TestCommands:
+
+    def make_registry(self):
+        subscription = Subscription(token='t', chat_id='1')
+        return SubscriberRegistry([subscription]), subscription
+
+    def test_not_subscribed(self):
+        registry, _ = self.make_registry()
+        assert status_reply(registry, 2, VERDICTS) == NOT_SUBSCRIBED
+        assert history_reply(registry, 2) == NOT_SUBSCRIBED
+
+    def test_no_data(self):
+        registry, _ = self.make_registry()
+        assert status_reply(registry, 1, VERDICTS) == NO_DATA
+
+    def test_status_and_history_from_cache(self):
+        registry, subscription = self.make_registry()
+        subscription.track_status(
+            Homework.build(1, 'hw1', 'reviewing', '2020-02-13T10:00:00Z')
+        )
+        subscription.track_status(
+            Homework.build(1, 'hw1', 'approved', '2020-02-14T10:00:00Z')
+        )
+        assert status_reply(registry, 1, VERDICTS) == '"hw1": Ура!'
+        history = history_reply(registry, 1).splitlines()
+        assert history == [
+            '2020-02-13T10:00:00Z "hw1": reviewing',
+            '2020-02-14T10:00:00Z "hw1": approved',
+        ]
+
+    def test_history_from_event_log(self, tmp_path):
+        registry, _ = self.make_registry()
+        store = StateStore(str(tmp_path / 'state.sqlite3'))
+        store.record_event('1', Homework.build(
+            1, 'hw1', 'approved', '2020-02-14T10:00:00Z'
+        ))
+        assert history_reply(registry, 1, store) == (
+            '2020-02-14T10:00:00Z "hw1": approved'
+        ), 'С журналом история не зависит от памяти процесса'
+        store.close()
+
+    def test_registry_chat_index(self):
+        registry, subscription = self.make_registry()
+        assert registry.by_chat('1') == [subscription]
+        registry.remove(subscription.key)
+        assert registry.by_chat('1') == []
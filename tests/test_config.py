@@ -0,0 +1,145 @@
+import json
+
+import pytest
+
+import homework
+from circuit_breaker import CircuitBreaker
+from config import Config, ConfigError, FileWatcher, load_config
+from models import Homework
+from scheduler import AdaptiveInterval, PollScheduler
+from subscribers import SubscriberRegistry, Subscription
+
+RELOADED = (
+    'CONFIG', 'CONFIG_FILE', 'PRACTICUM_TOKEN', 'TELEGRAM_CHAT_ID',
+    'SUBSCRIBERS_FILE', 'HEADERS', 'ENDPOINT', 'RETRY_TIME',
+    'POLL_MIN_INTERVAL', 'POLL_MAX_INTERVAL', 'SEND_GLOBAL_RATE',
+    'SEND_CHAT_RATE', 'SEND_COALESCE_WINDOW', 'WAVE_SIZE', 'TEMPLATES',
+)
+
+
+class TestLoadConfig:
+
+    def test_env_and_file(self, tmp_path):
+        path = tmp_path / 'bot.toml'
+        path.write_text(
+            'retry_time = 30\n'
+            '[homework_statuses]\n'
+            'approved = "Принято"\n',
+            encoding='utf-8'
+        )
+        environ = {'POLL_WORKERS': '3', 'RETRY_TIME': '90',
+                   'COMMANDS_ENABLED': '1'}
+        config = load_config(str(path), environ)
+        assert config.poll_workers == 3
+        assert config.commands_enabled is True
+        assert config.retry_time == 30, 'Значения файла важнее окружения'
+        assert config.homework_statuses == {'approved': 'Принято'}
+
+    def test_yaml(self, tmp_path):
+        pytest.importorskip('yaml')
+        path = tmp_path / 'bot.yaml'
+        path.write_text('send_chat_rate: 2\n', encoding='utf-8')
+        assert load_config(str(path), {}).send_chat_rate == 2.0
+
+    @pytest.mark.parametrize(
+        'content', ['unknown_key = 1', 'poll_workers = "many"']
+    )
+    def test_invalid_file(self, tmp_path, content):
+        path = tmp_path / 'bot.toml'
+        path.write_text(content, encoding='utf-8')
+        with pytest.raises(ConfigError):
+            load_config(str(path), {})
+
+    def test_problems(self):
+        assert Config().problems() == []
+        assert len(Config(poll_min_interval=100, send_chat_rate=0)
+                   .problems()) == 2
+
+
+def test_file_watcher(tmp_path):
+    path = tmp_path / 'bot.toml'
+    path.write_text('retry_time = 60', encoding='utf-8')
+    changes = []
+    watcher = FileWatcher(lambda: (str(path), None), lambda: changes.append(1))
+    assert not watcher.check()
+    path.write_text('retry_time = 120', encoding='utf-8')
+    assert watcher.check()
+    assert changes == [1]
+
+
+class FakeBot:
+
+    def set_rates(self, global_rate, chat_rate, coalesce_window=None):
+        self.rates = (global_rate, chat_rate, coalesce_window)
+
+
+class TestReloadConfig:
+
+    @pytest.fixture
+    def module_state(self, monkeypatch):
+        for name in RELOADED:
+            monkeypatch.setattr(homework, name, getattr(homework, name))
+        monkeypatch.setattr(
+            homework, 'HOMEWORK_STATUSES', dict(homework.HOMEWORK_STATUSES)
+        )
+        monkeypatch.setattr(
+            homework, 'PRACTICUM_BREAKER', CircuitBreaker('practicum')
+        )
+
+    def test_reload_applies_to_running_loop(self, tmp_path, monkeypatch,
+                                            module_state):
+        subscribers = tmp_path / 'subscribers.json'
+        subscribers.write_text(json.dumps([
+            {'token': 'kept', 'chat_id': 1}, {'token': 'new', 'chat_id': 2}
+        ]))
+        path = tmp_path / 'bot.toml'
+        path.write_text(
+            f'subscribers_file = "{subscribers.as_posix()}"\n'
+            'retry_time = 120\npoll_max_interval = 900\nsend_chat_rate = 2\n'
+            '[homework_statuses]\napproved = "Ура"\nreviewing = "На ревью"\n'
+            'rejected = "Есть замечания"\non_hold = "Работа на паузе"\n',
+            encoding='utf-8'
+        )
+        monkeypatch.setattr(homework, 'CONFIG_FILE', str(path))
+        kept = Subscription(token='kept', chat_id=1)
+        registry = SubscriberRegistry(
+            [kept, Subscription(token='gone', chat_id=3)]
+        )
+        scheduler = PollScheduler(60)
+        scheduler.spread(registry.keys())
+        interval = AdaptiveInterval(20, 60, 600)
+        bot = FakeBot()
+
+        assert homework.reload_config(
+            bot, registry, None, scheduler, interval
+        )
+        assert sorted(sub.token for sub in registry) == ['kept', 'new']
+        assert registry.get(kept.key) is kept, (
+            'Состояние оставшихся подписчиков не должно теряться'
+        )
+        assert interval.base_interval == scheduler.interval == 120
+        assert interval.max_interval == 900
+        assert bot.rates[1] == 2
+        approved = Homework.build(1, 'hw', 'approved', None)
+        assert homework.status_message(approved).endswith('Ура')
+        _, (on_hold,) = homework.validate_response(
+            {'homeworks': [{'homework_name': 'hw', 'status': 'on_hold'}],
+             'current_date': 1},
+            homework.HOMEWORK_STATUSES
+        )
+        assert homework.status_message(on_hold).endswith('Работа на паузе'), (
+            'Новый статус из настроек должен приводить к уведомлению'
+        )
+
+    def test_invalid_config_keeps_previous(self, tmp_path, monkeypatch,
+                                           module_state):
+        path = tmp_path / 'bot.toml'
+        path.write_text('poll_min_interval = 1000', encoding='utf-8')
+        monkeypatch.setattr(homework, 'CONFIG_FILE', str(path))
+        retry_time = homework.RETRY_TIME
+        registry = SubscriberRegistry()
+        assert not homework.reload_config(
+            FakeBot(), registry, None, PollScheduler(60),
+            AdaptiveInterval(20, 60, 600)
+        )
+        assert homework.RETRY_TIME == retry_time
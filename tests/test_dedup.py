@@ -0,0 +1,78 @@
+import homework
+from dedup import NotificationDeduplicator, notification_key
+from models import Homework
+from state_store import StateStore
+from subscribers import Subscription
+from utils import FakeClock
+
+
+HOMEWORK = Homework.build(1, 'hw1', 'approved', '2020-02-13T14:40:57Z')
+
+
+class TestNotificationDeduplicator:
+
+    def test_key_depends_on_status(self):
+        rejected = Homework.build(
+            1, 'hw1', 'rejected', '2020-02-13T14:40:57Z'
+        )
+        assert notification_key(1, HOMEWORK) != notification_key(1, rejected)
+        assert notification_key(1, HOMEWORK) != notification_key(2, HOMEWORK)
+
+    def test_duplicate_and_ttl(self):
+        clock = FakeClock(1000.0)
+        dedup = NotificationDeduplicator(ttl=60, clock=clock)
+        key = notification_key(1, HOMEWORK)
+        assert not dedup.is_duplicate(key)
+        dedup.remember(key)
+        assert dedup.is_duplicate(key)
+        clock.now += 61
+        assert not dedup.is_duplicate(key), (
+            'Ключ должен истекать по TTL'
+        )
+
+    def test_lru_bound(self):
+        dedup = NotificationDeduplicator(max_size=2)
+        for key in ('a', 'b'):
+            dedup.remember(key)
+        assert dedup.is_duplicate('a')
+        dedup.remember('c')
+        assert len(dedup) == 2
+        assert dedup.is_duplicate('a')
+        assert not dedup.is_duplicate('b')
+
+    def test_persisted_across_restart(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        store = StateStore(path)
+        NotificationDeduplicator(store=store).remember('a')
+        store.close()
+
+        store = StateStore(path)
+        assert NotificationDeduplicator(store=store).is_duplicate('a')
+        store.close()
+
+    def test_remembered_after_delivery(self, tmp_path):
+        class QueuedBot:
+            queued = True
+            pending = []
+
+            def send_message(self, chat_id, text, on_sent=None):
+                self.pending.append(on_sent)
+
+        store = StateStore(str(tmp_path / 'state.sqlite3'))
+        dedup = NotificationDeduplicator()
+        bot = QueuedBot()
+        subscription = Subscription(token='t', chat_id='1')
+        homework.notify_subscriber(
+            bot, subscription, (100, [HOMEWORK], b''), dedup, store
+        )
+        key = notification_key('1', HOMEWORK)
+        assert not dedup.is_duplicate(key), (
+            'Ключ запоминается только после доставки сообщения'
+        )
+        assert not store.last_events('1')
+        bot.pending.pop()()
+        assert dedup.is_duplicate(key)
+        assert [event.status for event in store.last_events('1')] == [
+            'approved'
+        ]
+        store.close()
@@ -0,0 +1,42 @@
+import pytest
+
+from error_state import ErrorFlag, ErrorState, error_key
+
+
+class TestErrorState:
+
+    def test_mark_once(self):
+        errors = ErrorState()
+        assert not errors
+        assert errors.mark('ENDPOINT_ERR'), (
+            'Первая отметка ошибки должна требовать уведомления'
+        )
+        assert not errors.mark('ENDPOINT_ERR'), (
+            'Повторная ошибка не должна требовать уведомления'
+        )
+        assert 'ENDPOINT_ERR' in errors
+        assert 'RESPONSE_NOT_DICT' not in errors
+
+    def test_clear(self):
+        errors = ErrorState()
+        errors.mark('ENDPOINT_ERR')
+        errors.mark('HOMEWORK_NOT_DICT')
+        errors.clear('ENDPOINT_ERR')
+        assert errors.keys() == ['HOMEWORK_NOT_DICT']
+        errors.clear()
+        assert not errors
+
+    def test_unknown_key(self):
+        with pytest.raises(KeyError):
+            ErrorState().mark('NO_SUCH_ERROR')
+
+    def test_load(self):
+        flags = ErrorFlag.ENDPOINT_ERR | ErrorFlag.RESPONSE_NOT_JSON
+        assert ErrorState.load(str(flags.value)).flags == flags
+        legacy = '{"ENDPOINT_ERR": true, "RESPONSE_NOT_DICT": false}'
+        assert ErrorState.load(legacy).keys() == ['ENDPOINT_ERR']
+
+    def test_error_key(self):
+        assert error_key(KeyError('msg', 'ENDPOINT_ERR')) == 'ENDPOINT_ERR'
+        assert error_key(KeyError('homework_name')) is None
+        assert error_key(KeyError('msg', 'NO_SUCH_ERROR')) is None
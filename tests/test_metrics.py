@@ -0,0 +1,51 @@
+import urllib.request
+
+import pytest
+
+import metrics
+
+
+class TestMetrics:
+
+    def test_counter_with_labels(self):
+        counter = metrics.Counter('test_total', 'Test counter', ('kind',))
+        counter.labels('a').inc()
+        counter.labels('a').inc(2)
+        counter.labels('b').inc()
+        assert counter.labels('a') is counter.labels('a')
+        exposed = counter.expose()
+        assert '# TYPE test_total counter' in exposed
+        assert 'test_total{kind="a"} 3' in exposed
+        assert 'test_total{kind="b"} 1' in exposed
+
+    def test_incomplete_metric_rejected(self):
+        class Incomplete(metrics._Metric):
+            kind = 'untyped'
+
+        with pytest.raises(TypeError):
+            Incomplete('test_incomplete', 'No samples')
+
+    def test_histogram_buckets_cumulative(self):
+        histogram = metrics.Histogram(
+            'test_seconds', 'Test histogram', buckets=(0.1, 1.0)
+        )
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+        lines = histogram.expose().splitlines()
+        assert 'test_seconds_bucket{le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{le="1.0"} 2' in lines
+        assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+        assert 'test_seconds_count 3' in lines
+
+    def test_http_exporter(self):
+        registry = metrics.Registry()
+        registry.register(metrics.Gauge('test_gauge', 'Test gauge', lambda: 7))
+        server = metrics.start_http_server(0, registry, host='127.0.0.1')
+        port = server.server_address[1]
+        try:
+            url = f'http://127.0.0.1:{port}/metrics'
+            with urllib.request.urlopen(url) as answer:
+                body = answer.read().decode()
+        finally:
+            server.shutdown()
+        assert 'test_gauge 7' in body
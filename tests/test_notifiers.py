@@ -0,0 +1,198 @@
+import io
+import json
+import threading
+
+import pytest
+import requests
+
+import notifiers
+from notifiers import (EmailNotifier, Notifier, NotifierDispatcher,
+                       StdoutNotifier, TelegramNotifier, WebhookNotifier)
+from subscribers import SubscriberRegistry
+
+
+class RecordingNotifier(Notifier):
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.batches = []
+        self.received = threading.Event()
+
+    def send_many(self, messages):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append(list(messages))
+        self.received.set()
+        return 0
+
+
+class TestDispatcher:
+
+    def test_fan_out_to_routes(self):
+        telegram, email = RecordingNotifier(), RecordingNotifier()
+        dispatcher = NotifierDispatcher(
+            {'telegram': telegram, 'email': email},
+            lambda chat_id: [('telegram', chat_id), ('email', 'a@b.c')]
+        )
+        dispatcher.start()
+        dispatcher.send_message(chat_id=1, text='hello')
+        assert dispatcher.close(timeout=5)
+        assert telegram.batches == [[(1, 'hello')]]
+        assert email.batches == [[('a@b.c', 'hello')]]
+        assert dispatcher.stats()['email']['sent'] == 1
+
+    def test_on_sent_after_primary_channel(self):
+        telegram, email = RecordingNotifier(), RecordingNotifier()
+        dispatcher = NotifierDispatcher(
+            {'telegram': telegram, 'email': email},
+            lambda chat_id: [('telegram', chat_id), ('email', 'a@b.c')]
+        )
+        delivered = []
+        dispatcher.start()
+        dispatcher.send_message(
+            chat_id=1, text='hello', on_sent=lambda: delivered.append(1)
+        )
+        assert dispatcher.close(timeout=5)
+        assert delivered == [1], (
+            'Доставка отмечается один раз, по основному каналу'
+        )
+
+    def test_slow_channel_does_not_block_others(self):
+        gate = threading.Event()
+        slow, fast = RecordingNotifier(gate), RecordingNotifier()
+        dispatcher = NotifierDispatcher(
+            {'slow': slow, 'fast': fast},
+            lambda chat_id: [('slow', chat_id), ('fast', chat_id)]
+        )
+        dispatcher.start()
+        dispatcher.send_message(chat_id=1, text='hello')
+        assert fast.received.wait(5), (
+            'Быстрый канал не должен ждать медленный'
+        )
+        assert not slow.batches
+        gate.set()
+        assert dispatcher.close(timeout=5)
+        assert slow.batches == [[(1, 'hello')]]
+
+    def test_failed_batch_counted(self):
+        class BrokenNotifier(Notifier):
+            def send_many(self, messages):
+                raise RuntimeError('down')
+
+        dispatcher = NotifierDispatcher(
+            {'telegram': BrokenNotifier()}, lambda chat_id: [('telegram', 1)]
+        )
+        dispatcher.start()
+        dispatcher.send_message(chat_id=1, text='hello')
+        dispatcher.close(timeout=5)
+        assert dispatcher.stats()['telegram']['failed'] == 1
+
+    def test_telegram_counted_as_queued(self):
+        class FakeQueue:
+            def start(self):
+                pass
+
+            def close(self, timeout=None):
+                return True
+
+            def depth(self):
+                return 0
+
+            def send_message(self, chat_id, text, on_sent=None):
+                pass
+
+        dispatcher = NotifierDispatcher(
+            {'telegram': TelegramNotifier(FakeQueue())},
+            lambda chat_id: [('telegram', chat_id)]
+        )
+        dispatcher.start()
+        dispatcher.send_message(chat_id=1, text='hello')
+        assert dispatcher.close(timeout=5)
+        stats = dispatcher.stats()['telegram']
+        assert (stats['queued'], stats['sent']) == (1, 0), (
+            'Постановка в SendQueue — ещё не доставка'
+        )
+
+
+class TestBackends:
+
+    def test_email_one_letter_per_address(self, monkeypatch):
+        sent = []
+
+        class FakeSMTP:
+            def __init__(self, host, port, timeout):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def send_message(self, email):
+                sent.append((email['To'], email.get_content().strip()))
+
+        monkeypatch.setattr(notifiers.smtplib, 'SMTP', FakeSMTP)
+        failed = EmailNotifier().send_many(
+            [('a@b.c', 'one'), ('x@y.z', 'other'), ('a@b.c', 'two')]
+        )
+        assert failed == 0
+        assert sent == [('a@b.c', 'one\n\ntwo'), ('x@y.z', 'other')]
+
+    def test_email_server_down(self, monkeypatch):
+        def refuse(*args, **kwargs):
+            raise ConnectionRefusedError('refused')
+
+        monkeypatch.setattr(notifiers.smtplib, 'SMTP', refuse)
+        assert EmailNotifier().send_many([('a@b.c', 'one')]) == 1
+
+    def test_webhook(self):
+        class FakeSession:
+            posted = []
+
+            def post(self, url, json, timeout):
+                self.posted.append((url, json))
+                response = requests.Response()
+                response.status_code = 500 if 'bad' in url else 200
+                return response
+
+        session = FakeSession()
+        failed = WebhookNotifier(session=session).send_many(
+            [('https://ok', 'one'), ('https://bad', 'x'), ('https://ok', 'two')]
+        )
+        assert failed == 1
+        assert session.posted[0] == ('https://ok', {'text': 'one\n\ntwo'})
+
+    def test_incomplete_backend_rejected(self):
+        class Incomplete(Notifier):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_stdout(self):
+        stream = io.StringIO()
+        StdoutNotifier(stream).send_many([('student', 'hello')])
+        assert stream.getvalue() == '[student] hello\n'
+
+
+class TestChannelsConfig:
+
+    def test_routes_from_subscribers_file(self, tmp_path):
+        path = tmp_path / 'subscribers.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1, 'channels': {'email': 'a@b.c'}},
+            {'token': 'b', 'chat_id': 1, 'channels': {'email': 'a@b.c'}},
+            {'token': 'c', 'chat_id': 2},
+        ]))
+        registry = SubscriberRegistry.from_file(str(path))
+        assert registry.routes(1) == [('telegram', 1), ('email', 'a@b.c')]
+        assert registry.routes(2) == [('telegram', 2)]
+
+    def test_unknown_channel(self, tmp_path):
+        path = tmp_path / 'subscribers.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1, 'channels': {'pigeon': 'x'}},
+        ]))
+        with pytest.raises(ValueError):
+            SubscriberRegistry.from_file(str(path))
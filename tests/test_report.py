@@ -0,0 +1,73 @@
+import io
+import json
+
+import pytest
+
+import homework
+import report
+from models import Homework
+from state_store import StateStore
+
+
+class TestReport:
+
+    def test_percentile_interpolates(self):
+        values = [1.0, 2.0, 3.0, 4.0]
+        assert report.percentile(values, 0) == 1.0
+        assert report.percentile(values, 50) == 2.5
+        assert report.percentile(values, 100) == 4.0
+        assert report.percentile([7.0], 99) == 7.0
+
+    def test_report_per_lesson_and_week(self, tmp_path):
+        store = StateStore(str(tmp_path / 'state.sqlite3'))
+        timeline = [
+            (1, 'Lesson 1', 'reviewing', '2020-02-13T10:00:00Z'),
+            (1, 'Lesson 1', 'approved', '2020-02-13T12:00:00Z'),
+            (2, 'Lesson 1', 'reviewing', '2020-02-17T10:00:00Z'),
+            (2, 'Lesson 1', 'rejected', '2020-02-17T14:00:00Z'),
+            (3, None, 'reviewing', '2020-02-17T10:00:00Z'),
+            (3, None, 'approved', '2020-02-17T11:00:00Z'),
+        ]
+        for homework_id, lesson, status, date in timeline:
+            store.record_event(1, Homework.build(
+                homework_id, f'hw{homework_id}', status, date, lesson
+            ))
+        rows = report.build_report(
+            report.aggregate(store.iter_review_times())
+        )
+        store.close()
+        assert [
+            (row['group'], row['key'], row['count'], row['p50_hours'])
+            for row in rows
+        ] == [
+            ('lesson', 'Lesson 1', 2, 3.0),
+            ('lesson', report.NO_LESSON, 1, 1.0),
+            ('week', '2020-02-10', 1, 2.0),
+            ('week', '2020-02-17', 2, 2.5),
+        ]
+
+    def test_csv_and_json_output(self):
+        rows = report.build_report({('week', '2020-02-10'): [3600.0]})
+        output = io.StringIO()
+        report.write_report(rows, output, 'csv')
+        assert output.getvalue().splitlines() == [
+            'group,key,count,p50_hours,p90_hours,p99_hours',
+            'week,2020-02-10,1,1.0,1.0,1.0',
+        ]
+        output = io.StringIO()
+        report.write_report(rows, output, 'json')
+        assert json.loads(output.getvalue()) == rows
+
+    def test_report_subcommand(self):
+        args = homework.parse_args(['report', '--format', 'json'])
+        assert args.command == 'report'
+        assert args.output_format == 'json'
+        assert homework.parse_args([]).command is None
+
+    def test_missing_state_db(self, tmp_path, monkeypatch):
+        path = tmp_path / 'missing.sqlite3'
+        monkeypatch.setattr(homework, 'STATE_DB', str(path))
+        with pytest.raises(SystemExit) as exit_info:
+            homework.review_report(io.StringIO())
+        assert 'STATE_DB not found' in str(exit_info.value)
+        assert not path.exists(), 'Отчёт не должен создавать пустую базу'
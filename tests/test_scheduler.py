@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import homework
+from models import Homework
+from scheduler import AdaptiveInterval, PollOutcome, PollScheduler
+from subscribers import SubscriberRegistry, Subscription
+from utils import FakeClock
+
+
+class TestPollScheduler:
+
+    def test_spread_over_interval(self):
+        clock = FakeClock()
+        scheduler = PollScheduler(60, clock=clock)
+        scheduler.spread(['a', 'b', 'c', 'd'])
+        order = []
+        for clock.now in (0, 15, 30, 45):
+            order.append(scheduler.wait_next(timeout=0))
+        assert order == ['a', 'b', 'c', 'd'], (
+            'Подписчики должны равномерно распределяться по окну опроса'
+        )
+
+    def test_reschedule_replaces_previous_due(self):
+        clock = FakeClock()
+        scheduler = PollScheduler(60, clock=clock)
+        scheduler.schedule('a', 10)
+        scheduler.schedule('a', 30)
+        clock.now = 20
+        assert scheduler.wait_next(timeout=0) is None
+        clock.now = 30
+        assert scheduler.wait_next(timeout=0) == 'a'
+        assert len(scheduler) == 0
+
+    def test_discard(self):
+        clock = FakeClock()
+        scheduler = PollScheduler(60, clock=clock)
+        scheduler.schedule('a', 0)
+        scheduler.discard('a')
+        assert scheduler.wait_next(timeout=0) is None
+
+
+class TestSubscriberRegistry:
+
+    def test_key_hides_token(self):
+        subscription = Subscription(token='secret', chat_id='42')
+        assert 'secret' not in subscription.key
+        assert subscription.key.startswith('42:')
+
+    def test_from_file(self, tmp_path):
+        path = tmp_path / 'subscribers.json'
+        path.write_text(
+            '[{"token": "t1", "chat_id": 1}, {"token": "t2", "chat_id": 2}]'
+        )
+        registry = SubscriberRegistry.from_file(str(path))
+        assert len(registry) == 2
+        assert {s.chat_id for s in registry} == {'1', '2'}
+
+
+class TestAdaptiveInterval:
+
+    def make(self):
+        return AdaptiveInterval(10, 60, 600, jitter=0)
+
+    def test_idle_backoff(self):
+        interval = self.make()
+        subscription = Subscription(token='t', chat_id='1')
+        delays = [
+            interval.next_delay(subscription, PollOutcome.UNCHANGED)
+            for _ in range(6)
+        ]
+        assert delays == [120, 240, 480, 600, 600, 600]
+        assert interval.next_delay(subscription, PollOutcome.CHANGED) == 60
+
+    def test_reviewing_polled_often(self):
+        interval = self.make()
+        subscription = Subscription(token='t', chat_id='1')
+        subscription.track_status(Homework.build(1, 'hw1', 'reviewing', None))
+        for _ in range(3):
+            assert interval.next_delay(
+                subscription, PollOutcome.UNCHANGED
+            ) == 10
+        subscription.track_status(Homework.build(1, 'hw1', 'approved', None))
+        assert interval.next_delay(subscription, PollOutcome.CHANGED) == 60
+
+    def test_error_backoff(self):
+        interval = self.make()
+        subscription = Subscription(token='t', chat_id='1')
+        subscription.track_status(Homework.build(1, 'hw1', 'reviewing', None))
+        assert interval.next_delay(subscription, PollOutcome.ERROR) == 120
+        assert interval.next_delay(subscription, PollOutcome.ERROR) == 240
+        assert interval.next_delay(
+            subscription, PollOutcome.UNCHANGED
+        ) == 10
+
+
+class TestWaves:
+
+    def test_wave_shares_from_date_and_notifies_in_order(self, monkeypatch):
+        dates = {'a': 200, 'b': 150, 'c': None}
+        requested = []
+
+        def fake_fetch(subscription, from_date=None):
+            requested.append(from_date)
+            current_date = dates[subscription.token]
+            if current_date is None:
+                raise homework.PracticumApiErr('boom', 'ENDPOINT_ERR')
+            homeworks = [Homework.build(
+                1, subscription.token, 'approved', None
+            )]
+            return current_date, homeworks, b'digest'
+
+        class Bot:
+            sent = []
+
+            def send_message(self, chat_id, text):
+                self.sent.append(chat_id)
+
+        monkeypatch.setattr(homework, 'fetch_statuses', fake_fetch)
+        wave = [
+            Subscription(token=token, chat_id=number, current_date=date)
+            for number, (token, date) in enumerate(zip('abc', (120, 90, 100)))
+        ]
+        bot = Bot()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            outcomes = homework.poll_wave(bot, wave, executor)
+        assert requested == [90, 90, 90], (
+            'Запросы волны идут с общим from_date — наименьшим current_date'
+        )
+        assert outcomes == [
+            PollOutcome.CHANGED, PollOutcome.CHANGED, PollOutcome.ERROR
+        ]
+        assert [sub.current_date for sub in wave] == [200, 150, 100]
+        assert bot.sent == [0, 1, 2], (
+            'Уведомления волны отправляются одним потоком по порядку'
+        )
+
+    def test_failing_subscriber_does_not_pin_wave(self, monkeypatch):
+        requested = {}
+
+        def fake_fetch(subscription, from_date=None):
+            requested[subscription.token] = from_date
+            return 300, [], b'digest'
+
+        monkeypatch.setattr(homework, 'fetch_statuses', fake_fetch)
+        healthy = Subscription(token='a', chat_id=1, current_date=120)
+        failing = Subscription(token='b', chat_id=2, current_date=50)
+        failing.errors.mark('ENDPOINT_ERR')
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            homework.poll_wave(None, [healthy, failing], executor)
+            assert requested == {'a': 120, 'b': 50}, (
+                'Подписчик с ошибкой не сдвигает from_date волны'
+            )
+            healthy.current_date, failing.current_date = 300, 50
+            homework.poll_wave(
+                None, [healthy, failing], executor, wave_date=250
+            )
+        assert requested == {'a': 250, 'b': 50}, (
+            'Волна идёт с общего wave_date, отставший догоняет со своего'
+        )
+
+    def test_wave_timestamp_capped(self, monkeypatch):
+        monkeypatch.setattr(homework, 'RETRY_TIME', 600)
+        monkeypatch.setattr(homework.time, 'time', lambda: 10_000.0)
+        timeout = sum(homework.API_TIMEOUT)
+        assert homework.wave_timestamp(9_500.0) == 9_500
+        assert homework.wave_timestamp(1_000.0) == int(
+            10_000 - 600 - timeout
+        )
@@ -0,0 +1,134 @@
+import pytest
+from telegram.error import BadRequest, RetryAfter
+
+from exceptions import TelegramSendErr
+from send_queue import MESSAGE_LIMIT, SendQueue, TokenBucket, split_message
+from utils import FakeClock
+
+
+class FlakyBot:
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+class TestTokenBucket:
+
+    def test_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.5)
+        clock.now = 0.5
+        assert bucket.reserve() == 0
+
+
+class TestSendQueue:
+
+    def test_messages_delivered_in_order(self):
+        bot = FlakyBot()
+        queue = SendQueue(bot, workers=1, chat_rate=1000)
+        queue.start()
+        for number in range(5):
+            queue.send_message(chat_id=1, text=str(number))
+        assert queue.close(timeout=5)
+        assert bot.sent == [(1, str(number)) for number in range(5)]
+        assert queue.stats()['sent'] == 5
+
+    def test_retry_after_not_lost(self):
+        bot = FlakyBot([RetryAfter(0.01)])
+        queue = SendQueue(bot, workers=2, chat_rate=1000)
+        queue.start()
+        queue.send_message(chat_id=1, text='hello')
+        assert queue.close(timeout=5)
+        assert bot.sent == [(1, 'hello')], (
+            'При RetryAfter сообщение должно быть отправлено повторно'
+        )
+        stats = queue.stats()
+        assert stats['rate_limited'] == 1
+        assert stats['dropped'] == 0
+
+    def test_bad_request_dropped(self):
+        bot = FlakyBot([BadRequest('chat not found')])
+        queue = SendQueue(bot, workers=1)
+        queue.start()
+        queue.send_message(chat_id=1, text='hello')
+        assert queue.close(timeout=5)
+        assert queue.stats()['dropped'] == 1
+
+    def test_on_sent_only_after_delivery(self):
+        bot = FlakyBot([BadRequest('chat not found')])
+        queue = SendQueue(bot, workers=1, chat_rate=1000)
+        queue.start()
+        delivered = []
+        queue.send_message(
+            chat_id=1, text='dropped', on_sent=lambda: delivered.append(1)
+        )
+        queue.send_message(
+            chat_id=2, text='sent', on_sent=lambda: delivered.append(2)
+        )
+        assert queue.close(timeout=5)
+        assert delivered == [2], (
+            'Отброшенное сообщение не должно считаться доставленным'
+        )
+
+    def test_on_sent_of_coalesced_messages(self):
+        bot = FlakyBot()
+        queue = SendQueue(bot, workers=1, chat_rate=1000, coalesce_window=0.2)
+        queue.start()
+        delivered = []
+        for number in range(3):
+            queue.send_message(
+                chat_id=1, text=str(number),
+                on_sent=lambda number=number: delivered.append(number)
+            )
+        assert queue.close(timeout=5)
+        assert len(bot.sent) == 1
+        assert delivered == [0, 1, 2]
+
+    def test_overflow(self):
+        queue = SendQueue(FlakyBot(), max_size=1)
+        queue.send_message(chat_id=1, text='a')
+        with pytest.raises(TelegramSendErr):
+            queue.send_message(chat_id=1, text='b')
+        assert queue.stats()['depth'] == 1
+
+    def test_messages_coalesced_per_chat(self):
+        bot = FlakyBot()
+        queue = SendQueue(bot, workers=1, chat_rate=1000, coalesce_window=0.2)
+        queue.start()
+        for number in range(3):
+            queue.send_message(chat_id=1, text=str(number))
+        queue.send_message(chat_id=2, text='other')
+        assert queue.close(timeout=5)
+        assert sorted(bot.sent) == [(1, '0\n\n1\n\n2'), (2, 'other')], (
+            'Сообщения в один чат должны склеиваться в одно'
+        )
+        assert queue.stats()['coalesced'] == 2
+
+    def test_coalesced_message_split_at_limit(self):
+        bot = FlakyBot()
+        queue = SendQueue(bot, workers=1, chat_rate=1000, coalesce_window=0.2)
+        queue.start()
+        for _ in range(3):
+            queue.send_message(chat_id=1, text='x' * 2000)
+        queue.send_message(chat_id=1, text='y' * 5000)
+        assert queue.close(timeout=5)
+        assert all(len(text) <= MESSAGE_LIMIT for _, text in bot.sent)
+        assert ''.join(text for _, text in bot.sent).replace('\n', '') == (
+            'x' * 6000 + 'y' * 5000
+        )
+        assert len(bot.sent) == 4
+
+
+def test_split_message_on_lines():
+    text = '\n'.join(['a' * 3000, 'b' * 3000])
+    assert split_message(text) == ['a' * 3000, 'b' * 3000]
+    assert split_message('short') == ['short']
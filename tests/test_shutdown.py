@@ -0,0 +1,197 @@
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import homework
+from config import Config
+from subscribers import SubscriberRegistry, Subscription
+
+
+class FakeStore:
+
+    def __init__(self):
+        self.saved = []
+
+    def save(self, subscription):
+        self.saved.append(subscription.key)
+
+
+class TestShutdown:
+
+    def test_signal_calls_stop(self, monkeypatch):
+        stop = threading.Event()
+        previous = {
+            signum: signal.getsignal(signum)
+            for signum in homework.SHUTDOWN_SIGNALS
+        }
+        try:
+            homework.stop_on_signals(stop.set)
+            os.kill(os.getpid(), signal.SIGTERM)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        assert stop.is_set(), 'SIGTERM должен запускать штатную остановку'
+
+    def test_run_polling_stops_and_checkpoints(self, monkeypatch):
+        stop = threading.Event()
+        polled = []
+
+        def fake_poll(bot, subscription, dedup=None, events=None):
+            polled.append(subscription.key)
+            stop.set()
+            return homework.PollOutcome.UNCHANGED
+
+        monkeypatch.setattr(homework, 'poll_subscriber', fake_poll)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 0.01)
+        registry = SubscriberRegistry([Subscription(token='t', chat_id=1)])
+        store = FakeStore()
+        loop = threading.Thread(
+            target=homework.run_polling,
+            args=(None, registry, store, None, stop)
+        )
+        loop.start()
+        loop.join(timeout=5)
+        assert not loop.is_alive(), 'Цикл опроса должен завершаться по stop'
+        assert store.saved == polled[:len(store.saved)]
+        assert store.saved, 'Состояние опрошенных подписчиков сохраняется'
+
+    def test_failed_checkpoint_keeps_polling(self, monkeypatch):
+        stop = threading.Event()
+        polled = []
+        registry = SubscriberRegistry([
+            Subscription(token='a', chat_id=1),
+            Subscription(token='b', chat_id=2),
+        ])
+
+        def fake_poll(bot, subscription, dedup=None, events=None):
+            polled.append(subscription.key)
+            if all(polled.count(key) >= 3 for key in registry.keys()):
+                stop.set()
+            return homework.PollOutcome.UNCHANGED
+
+        class FailingStore(FakeStore):
+            def save(self, subscription):
+                super().save(subscription)
+                if len(self.saved) == 1:
+                    raise sqlite3.OperationalError('database is locked')
+
+        monkeypatch.setattr(homework, 'poll_subscriber', fake_poll)
+        for name in ('RETRY_TIME', 'POLL_MIN_INTERVAL', 'POLL_MAX_INTERVAL'):
+            monkeypatch.setattr(homework, name, 0.01)
+        loop = threading.Thread(
+            target=homework.run_polling,
+            args=(None, registry, FailingStore(), None, stop)
+        )
+        loop.start()
+        every_polled = stop.wait(timeout=5)
+        stop.set()
+        loop.join(timeout=5)
+        assert every_polled, (
+            'Сбой чекпоинта не должен снимать подписчика с опроса'
+        )
+
+    def test_crashed_poll_keeps_polling(self, monkeypatch):
+        stop = threading.Event()
+        polled = []
+        registry = SubscriberRegistry([Subscription(token='a', chat_id=1)])
+
+        def crashing_poll(bot, subscription, dedup=None, events=None):
+            polled.append(subscription.key)
+            if len(polled) >= 3:
+                stop.set()
+            raise KeyError('homework_name')
+
+        monkeypatch.setattr(homework, 'poll_subscriber', crashing_poll)
+        for name in ('RETRY_TIME', 'POLL_MIN_INTERVAL', 'POLL_MAX_INTERVAL'):
+            monkeypatch.setattr(homework, name, 0.01)
+        loop = threading.Thread(
+            target=homework.run_polling,
+            args=(None, registry, FakeStore(), None, stop)
+        )
+        loop.start()
+        polled_again = stop.wait(timeout=5)
+        stop.set()
+        loop.join(timeout=5)
+        assert polled_again, 'Упавший опрос не должен снимать подписчика'
+
+    def test_plain_key_error_not_notified(self, monkeypatch):
+        sent = []
+        monkeypatch.setattr(homework, 'errors_sender',
+                            lambda *args: sent.append(args))
+        subscription = Subscription(token='a', chat_id=1)
+        outcome = homework.poll_failed(
+            None, subscription, KeyError('homework_name')
+        )
+        assert outcome is homework.PollOutcome.ERROR
+        assert not sent, 'KeyError без ключа ошибки не уведомляется'
+
+    def test_hung_poll_does_not_block_shutdown(self, monkeypatch):
+        stop, release = threading.Event(), threading.Event()
+
+        def hung_fetch(subscription, from_date=None):
+            stop.set()
+            release.wait(10)
+            return None
+
+        def hung_poll(bot, subscription, dedup=None, events=None):
+            return hung_fetch(subscription)
+
+        monkeypatch.setattr(homework, 'poll_subscriber', hung_poll)
+        monkeypatch.setattr(homework, 'fetch_statuses', hung_fetch)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 0.01)
+        monkeypatch.setattr(homework, 'SHUTDOWN_TIMEOUT', 0.1)
+        try:
+            for run in (homework.run_polling, homework.run_waves):
+                stop.clear()
+                registry = SubscriberRegistry(
+                    [Subscription(token='t', chat_id=1)]
+                )
+                store = FakeStore()
+                loop = threading.Thread(
+                    target=run, args=(None, registry, store, None, stop)
+                )
+                loop.start()
+                loop.join(timeout=5)
+                assert not loop.is_alive(), (
+                    'Ожидание текущих опросов ограничено SHUTDOWN_TIMEOUT'
+                )
+                assert not store.saved
+        finally:
+            release.set()
+
+    def test_check_config(self, monkeypatch):
+        monkeypatch.setattr(homework, 'SUBSCRIBERS_FILE', None)
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', None)
+        monkeypatch.setattr(homework, 'CONFIG', Config(poll_workers=0))
+        problems = homework.check_config()
+        assert len(problems) == 2
+
+
+def test_startup_without_telegram_import():
+    code = 'import sys, homework; print("telegram" in sys.modules)'
+    result = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True,
+        cwd=Path(__file__).resolve().parents[1]
+    )
+    assert result.stdout.strip() == 'False', (
+        'telegram должен импортироваться только при создании бота'
+    )
+
+
+def test_invalid_config_reported_on_startup():
+    environ = dict(os.environ, RETRY_TIME='abc')
+    for command in ([], ['report']):
+        result = subprocess.run(
+            [sys.executable, 'homework.py', *command], capture_output=True,
+            text=True, env=environ, timeout=30,
+            cwd=Path(__file__).resolve().parents[1]
+        )
+        assert result.returncode == 1
+        assert 'Traceback' not in result.stderr
+        assert 'Invalid configuration: retry_time' in (
+            result.stdout + result.stderr
+        ), 'Ошибка настроек должна сообщаться без трейсбека'
@@ -0,0 +1,202 @@
+import sqlite3
+
+import pytest
+
+import homework
+from dedup import NotificationDeduplicator
+from models import Homework
+from state_store import StateStore
+from subscribers import Subscription
+
+
+class TestStateStore:
+
+    def test_checkpoint_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        store = StateStore(path)
+        subscription = Subscription(token='t', chat_id='1', current_date=100)
+        subscription.errors.mark('ENDPOINT_ERR')
+        store.save(subscription)
+        store.close()
+
+        store = StateStore(path)
+        restored = Subscription(token='t', chat_id='1')
+        assert store.restore(restored)
+        assert restored.current_date == 100
+        assert restored.errors.keys() == ['ENDPOINT_ERR']
+        assert not store.restore(Subscription(token='x', chat_id='2'))
+        store.close()
+
+    def test_checkpoint_waits_for_delivery(self, tmp_path):
+        class QueuedBot:
+            queued = True
+            pending = []
+
+            def send_message(self, chat_id, text, on_sent=None):
+                self.pending.append(on_sent)
+
+        path = str(tmp_path / 'state.sqlite3')
+        store = StateStore(path)
+        bot = QueuedBot()
+        subscription = Subscription(token='t', chat_id='1', current_date=100)
+        fetched = (200, [Homework.build(1, 'hw1', 'approved', None)], b'')
+        homework.notify_subscriber(bot, subscription, fetched)
+        assert subscription.current_date == 200
+        store.save(subscription)
+        store.flush()
+        restored = Subscription(token='t', chat_id='1')
+        store.restore(restored)
+        assert restored.current_date == 100, (
+            'До доставки уведомлений чекпоинт хранит прежнюю метку'
+        )
+        bot.pending.pop()()
+        store.save(subscription)
+        store.flush()
+        store.restore(restored)
+        assert restored.current_date == 200
+        store.close()
+
+    def test_failed_send_releases_checkpoint(self):
+        class FailingBot:
+            def send_message(self, chat_id, text):
+                raise homework.TelegramSendErr('down')
+
+        subscription = Subscription(token='t', chat_id='1', current_date=100)
+        fetched = (200, [Homework.build(1, 'hw1', 'approved', None)], b'')
+        with pytest.raises(homework.TelegramSendErr):
+            homework.notify_subscriber(FailingBot(), subscription, fetched)
+        subscription.current_date = 300
+        assert subscription.checkpoint_date == 300, (
+            'Неотправленный опрос повторится и не держит чекпоинт'
+        )
+
+    def test_writes_are_batched(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        store = StateStore(path, batch_size=3)
+        reader = StateStore(path)
+        subscriptions = [
+            Subscription(token=str(i), chat_id=str(i), current_date=i)
+            for i in range(3)
+        ]
+        store.save(subscriptions[0])
+        store.save(subscriptions[0])
+        store.save(subscriptions[1])
+        assert not reader.restore(Subscription(token='0', chat_id='0')), (
+            'Запись должна откладываться до заполнения пачки'
+        )
+        store.save(subscriptions[2])
+        assert reader.restore(Subscription(token='0', chat_id='0'))
+        store.close()
+        reader.close()
+
+    def test_failed_flush_keeps_batch(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        store = StateStore(path)
+        store.save(Subscription(token='t', chat_id='1', current_date=100))
+        connection = store._conn
+
+        class LockedConnection:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def executemany(self, *args):
+                raise sqlite3.OperationalError('database is locked')
+
+        store._conn = LockedConnection()
+        with pytest.raises(sqlite3.OperationalError):
+            store.flush()
+        store._conn = connection
+        store.close()
+
+        store = StateStore(path)
+        restored = Subscription(token='t', chat_id='1')
+        assert store.restore(restored), (
+            'Пачка не должна теряться при сбое записи'
+        )
+        assert restored.current_date == 100
+        store.close()
+
+
+class TestEventLog:
+
+    def record(self, store, chat_id, homework_id, status, date):
+        store.record_event(chat_id, Homework.build(
+            homework_id, f'hw{homework_id}', status, date
+        ))
+
+    def test_last_events_per_chat(self, tmp_path):
+        store = StateStore(str(tmp_path / 'state.sqlite3'))
+        self.record(store, 1, 1, 'reviewing', '2020-02-13T10:00:00Z')
+        self.record(store, 2, 2, 'reviewing', '2020-02-13T11:00:00Z')
+        self.record(store, 1, 1, 'rejected', '2020-02-14T10:00:00Z')
+        self.record(store, 1, 1, 'approved', '2020-02-15T10:00:00Z')
+        events = store.last_events(1, limit=2)
+        assert [(hw.name, hw.status) for hw in events] == [
+            ('hw1', 'rejected'), ('hw1', 'approved')
+        ], 'Последние N событий чата, от старых к новым'
+        store.close()
+
+    def test_review_times(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        store = StateStore(path)
+        self.record(store, 1, 1, 'reviewing', '2020-02-13T10:00:00Z')
+        self.record(store, 1, 1, 'rejected', '2020-02-13T12:00:00Z')
+        self.record(store, 1, 1, 'reviewing', '2020-02-14T10:00:00Z')
+        self.record(store, 1, 1, 'approved', '2020-02-14T10:30:00Z')
+        self.record(store, 2, 2, 'approved', '2020-02-14T11:00:00Z')
+        store.close()
+
+        store = StateStore(path)
+        times = [
+            (chat_id, name, status, week, round(seconds))
+            for chat_id, name, _, status, _, week, seconds
+            in store.review_times()
+        ]
+        assert times == [
+            ('1', 'hw1', 'rejected', '2020-02-10', 7200),
+            ('1', 'hw1', 'approved', '2020-02-10', 1800),
+        ], 'Вердикт без события reviewing в отчёт не попадает'
+        assert store.review_times(chat_id=2) == []
+        store.close()
+
+    def test_notifications_recorded_once(self, tmp_path):
+        store = StateStore(str(tmp_path / 'state.sqlite3'))
+        subscription = Subscription(token='t', chat_id='1')
+        homeworks = [
+            Homework.build(1, 'hw1', 'approved', '2020-02-14T10:00:00Z')
+        ]
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                pass
+
+        dedup = NotificationDeduplicator()
+        for _ in range(2):
+            homework.notify_subscriber(
+                Bot(), subscription, (100, homeworks, b''), dedup, store
+            )
+        assert len(store.last_events('1')) == 1, (
+            'Повтор уже отправленного уведомления не пишется в журнал'
+        )
+        store.close()
+
+    def test_event_log_migration(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        conn = sqlite3.connect(path)
+        conn.execute(
+            'CREATE TABLE events (id INTEGER PRIMARY KEY, chat_id TEXT, '
+            'homework_id TEXT, homework_name TEXT, status TEXT, '
+            'date_updated TEXT, recorded_at REAL)'
+        )
+        conn.close()
+        store = StateStore(path)
+        store.record_event(1, Homework.build(
+            1, 'hw1', 'approved', '2020-02-14T10:00:00Z', 'Lesson 1'
+        ))
+        assert store.last_events(1)[0].lesson_name == 'Lesson 1', (
+            'Журнал прежней версии дополняется колонкой lesson_name'
+        )
+        store.close()
@@ -0,0 +1,112 @@
+from collections import Counter
+
+import homework
+from subscribers import Subscription
+from supervisor import HashRing, Supervisor
+
+
+class FakeProcess:
+
+    def __init__(self):
+        self.alive = True
+        self.exitcode = None
+
+    def is_alive(self):
+        return self.alive
+
+    def crash(self):
+        self.alive = False
+        self.exitcode = 1
+
+    def terminate(self):
+        self.alive = False
+
+    def join(self, timeout=None):
+        pass
+
+
+class FakeSupervisor(Supervisor):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = []
+
+    def _start(self, node):
+        self.started.append(node)
+        self._processes[node] = FakeProcess()
+
+
+class TestHashRing:
+
+    def test_balanced_and_stable(self):
+        nodes = [f'worker-{number}' for number in range(4)]
+        keys = [f'{number}:token' for number in range(4000)]
+        ring = HashRing(nodes)
+        shares = Counter(ring.node_for(key) for key in keys)
+        assert set(shares) == set(nodes)
+        assert min(shares.values()) > 600, 'Шарды должны быть сбалансированы'
+
+        smaller = HashRing(nodes[:3])
+        moved = [
+            key for key in keys
+            if ring.node_for(key) != 'worker-3'
+            and ring.node_for(key) != smaller.node_for(key)
+        ]
+        assert not moved, (
+            'При удалении узла должны переезжать только его ключи'
+        )
+
+    def test_shards_by_chat(self):
+        nodes = [f'worker-{number}' for number in range(4)]
+        owners = {node: homework.shard_owner(node, nodes) for node in nodes}
+        for chat_id in range(50):
+            subscriptions = [
+                Subscription(token=f'{chat_id}-{number}', chat_id=chat_id)
+                for number in range(3)
+            ]
+            shards = {
+                node for node, owns in owners.items()
+                for subscription in subscriptions if owns(subscription)
+            }
+            assert len(shards) == 1, (
+                'Подписчики одного чата должны опрашиваться одним воркером'
+            )
+
+
+class TestSupervisor:
+
+    def test_restart_and_rebalance(self):
+        supervisor = FakeSupervisor(3, target=None, max_restarts=2)
+        for node in supervisor.nodes:
+            supervisor._start(node)
+        supervisor._processes['worker-1'].crash()
+        supervisor.check()
+        assert 'worker-1' not in supervisor._processes
+        supervisor._restart_at['worker-1'] = 0
+        supervisor.check()
+        assert supervisor.started.count('worker-1') == 2, (
+            'Упавший воркер должен быть перезапущен'
+        )
+
+        supervisor._processes['worker-1'].crash()
+        supervisor.check()
+        assert supervisor.nodes == ['worker-0', 'worker-2'], (
+            'Часто падающий воркер выводится из кольца'
+        )
+        assert set(supervisor._processes) == {'worker-0', 'worker-2'}
+
+    def test_rebalance_keeps_new_workers(self):
+        supervisor = FakeSupervisor(3, target=None, max_restarts=1)
+        for node in supervisor.nodes:
+            supervisor._start(node)
+        supervisor._processes['worker-0'].crash()
+        supervisor.check()
+        assert supervisor.nodes == ['worker-1', 'worker-2']
+        assert set(supervisor._processes) == {'worker-1', 'worker-2'}, (
+            'Перезапущенные при ребалансировке воркеры остаются под надзором'
+        )
+        assert all(
+            process.is_alive() for process in supervisor._processes.values()
+        )
+        assert not supervisor._restart_at
+        assert supervisor._crashes['worker-1'] == []
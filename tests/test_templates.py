@@ -0,0 +1,95 @@
+import pytest
+
+import homework
+import templates
+from config import DEFAULT_STATUSES, Config
+from models import Homework
+from subscribers import Subscription
+from templates import MessageTemplates, TemplateError, build_locales
+
+RICH = {
+    'ru': {
+        'message': 'Работа "{homework_name}" ({lesson_name}): {verdict}\n'
+                   'Комментарий ревьюера: {reviewer_comment}',
+    },
+}
+
+
+def make_templates(overrides=None, default_locale='ru'):
+    return MessageTemplates(
+        build_locales(DEFAULT_STATUSES, overrides), DEFAULT_STATUSES,
+        default_locale
+    )
+
+
+class TestTemplates:
+
+    def test_default_ru_from_homework_statuses(self):
+        message = make_templates().render(
+            Homework.build(1, 'hw1', 'approved', None)
+        )
+        assert message == (
+            'Изменился статус проверки работы "hw1". '
+            + DEFAULT_STATUSES['approved']
+        )
+
+    def test_locales_and_fallback(self):
+        compiled = make_templates({'de': {'approved': 'Angenommen!'}})
+        approved = Homework.build(1, 'hw1', 'approved', None)
+        assert compiled.render(approved, 'en') == (
+            'Homework "hw1" status changed. '
+            'Reviewed: the reviewer liked everything. Hooray!'
+        )
+        assert compiled.render(approved, 'de').endswith('Angenommen!'), (
+            'Шаблон сообщения берётся из локали по умолчанию'
+        )
+        assert compiled.render(approved, 'xx') == compiled.render(approved)
+
+    def test_rich_template_skips_empty_lines(self):
+        compiled = make_templates(RICH)
+        with_comment = Homework.build(
+            1, 'hw1', 'rejected', None, 'Lesson 1', 'Поправьте тесты'
+        )
+        assert compiled.render(with_comment).splitlines() == [
+            'Работа "hw1" (Lesson 1): ' + DEFAULT_STATUSES['rejected'],
+            'Комментарий ревьюера: Поправьте тесты',
+        ]
+        without_comment = Homework.build(1, 'hw1', 'approved', None)
+        assert compiled.render(without_comment) == (
+            'Работа "hw1" (): ' + DEFAULT_STATUSES['approved']
+        ), 'Строка шаблона без заполненных полей пропускается'
+
+    def test_compiled_once(self, monkeypatch):
+        compiled = make_templates(RICH)
+
+        def no_parsing():
+            raise AssertionError('template parsed on render')
+
+        monkeypatch.setattr(templates, 'Formatter', no_parsing)
+        compiled.render(Homework.build(1, 'hw1', 'approved', None), 'en')
+
+    @pytest.mark.parametrize('message', [
+        'Работа {name}', 'Работа {homework_name!r}', 'Работа {homework_name',
+    ])
+    def test_invalid_template(self, message):
+        with pytest.raises(TemplateError):
+            make_templates({'en': {'message': message}})
+        config = Config(templates={'en': {'message': message}})
+        assert config.problems()
+
+    def test_subscriber_locale(self, monkeypatch):
+        monkeypatch.setattr(homework, 'TEMPLATES', make_templates())
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append(text)
+
+        subscription = Subscription(token='t', chat_id='1', locale='en')
+        homework.notify_subscriber(Bot(), subscription, (
+            100, [Homework.build(1, 'hw1', 'approved', None)], b''
+        ))
+        assert sent == [
+            'Homework "hw1" status changed. '
+            'Reviewed: the reviewer liked everything. Hooray!'
+        ]
@@ -0,0 +1,75 @@
+import pytest
+
+import validation
+from exceptions import ApiResponseNotCorrect, UndefinedHWStatus
+from models import Homework, HomeworkStatus
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+class TestValidation:
+
+    def test_decode_once_to_records(self):
+        body = (b'{"current_date": 100, "homeworks": [{"id": 7, '
+                b'"homework_name": "hw1", "status": "approved", '
+                b'"date_updated": "2020-02-13T14:40:57Z", '
+                b'"lesson_name": "Final project", '
+                b'"reviewer_comment": "ok"}]}')
+        current_date, homeworks = validation.validate_response(
+            validation.decode(body), STATUSES
+        )
+        assert current_date == 100
+        assert homeworks == [Homework(
+            7, 'hw1', HomeworkStatus.APPROVED, '2020-02-13T14:40:57Z',
+            'Final project', 'ok'
+        )]
+
+    def test_configured_status(self):
+        current_date, homeworks = validation.validate_response(
+            {'homeworks': [{'homework_name': 'hw1', 'status': 'on_hold'}],
+             'current_date': 1},
+            STATUSES + ('on_hold',)
+        )
+        assert homeworks[0].status == 'on_hold', (
+            'Статус из homework_statuses настроек принимается, '
+            'даже если его нет в HomeworkStatus'
+        )
+        assert Homework.build(1, 'hw1', 'approved', None).status is (
+            HomeworkStatus.APPROVED
+        )
+
+    def test_decode_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(validation, 'orjson', None)
+        assert validation.decode(b'{"a": 1}') == {'a': 1}
+
+    @pytest.mark.parametrize('response, err_key', [
+        ({}, 'RESPONSE_DONT_CONTAINS_ALL_KEYS'),
+        ('text', 'RESPONSE_NOT_DICT'),
+        ({'homeworks': {}, 'current_date': 1}, 'HOMEWORKS_NOT_LIST'),
+        ({'homeworks': [], 'current_date': '1'}, 'CURRENT_DATE_NOT_INT'),
+        ({'homeworks': [{'homework_name': 'hw'}], 'current_date': 1},
+         'HOMEWORK_STATUS_NOT_FOUND'),
+        ({'homeworks': [1], 'current_date': 1}, 'HOMEWORK_NOT_DICT'),
+    ])
+    def test_response_errors(self, response, err_key):
+        with pytest.raises(ApiResponseNotCorrect) as err:
+            validation.validate_response(response, STATUSES)
+        assert err.value.args[1] == err_key
+
+    def test_homework_errors(self):
+        with pytest.raises(KeyError):
+            validation.validate_response(
+                {'homeworks': [{'status': 'approved'}], 'current_date': 1},
+                STATUSES
+            )
+        with pytest.raises(UndefinedHWStatus):
+            validation.validate_response(
+                {'homeworks': [{'homework_name': 'hw', 'status': 'unknown'}],
+                 'current_date': 1},
+                STATUSES
+            )
+
+    def test_not_json(self):
+        with pytest.raises(ApiResponseNotCorrect) as err:
+            validation.decode(b'<html>')
+        assert err.value.args[1] == 'RESPONSE_NOT_JSON'
@@ -2,6 +2,16 @@ from inspect import signature
 from types import ModuleType
 
 
+class FakeClock:
+    """Clock for time-dependent classes, moved by hand through `now`."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
 def check_function(scope: ModuleType, func_name: str, params_qty: int = 0):
     """Checks if scope has a function with specific name and params with qty"""
     assert hasattr(scope, func_name), (
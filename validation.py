@@ -0,0 +1,93 @@
+"""
+Однопроходная проверка ответа API Практикум.Домашки.
+Тело ответа декодируется один раз (orjson, если установлен), затем за один
+обход проверяется и сам ответ, и каждая домашняя работа.
+Ошибки — те же исключения и ключи ErrorFlag, что у check_response/parse_status.
+"""
+import json
+
+from exceptions import ApiResponseNotCorrect, UndefinedHWStatus
+from models import Homework
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def decode(body: bytes):
+    """Декодирование JSON-тела ответа API."""
+    try:
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+    except ValueError:
+        raise ApiResponseNotCorrect(
+            'Ответ API Практикум.Домашка не является JSON!',
+            'RESPONSE_NOT_JSON'
+        )
+
+
+def validate_response(response, statuses) -> tuple:
+    """
+    Проверка ответа API и всех работ в нём.
+    Возвращает (current_date, [Homework, ...]).
+    """
+    if isinstance(response, list) and response:
+        response = response[0]
+    if not isinstance(response, dict):
+        raise ApiResponseNotCorrect(
+            'По API Практикум.Домашка ожидаем словарь!',
+            'RESPONSE_NOT_DICT'
+        )
+    try:
+        homeworks = response['homeworks']
+        current_date = response['current_date']
+    except KeyError:
+        raise ApiResponseNotCorrect(
+            'В API-ответе ожидаем ключи "current_date" и "homeworks"!',
+            'RESPONSE_DONT_CONTAINS_ALL_KEYS'
+        )
+    if not isinstance(homeworks, list):
+        raise ApiResponseNotCorrect(
+            'В API-ответе по ключу "homeworks" ожидаем список!',
+            'HOMEWORKS_NOT_LIST'
+        )
+    if not isinstance(current_date, int):
+        raise ApiResponseNotCorrect(
+            'В API-ответе по ключу "current_date" ожидаем целое число!',
+            'CURRENT_DATE_NOT_INT'
+        )
+    return current_date, [
+        validate_homework(homework, statuses) for homework in homeworks
+    ]
+
+
+def validate_homework(homework, statuses) -> Homework:
+    """Проверка одной домашней работы из ответа API."""
+    if not isinstance(homework, dict):
+        raise ApiResponseNotCorrect(
+            'В API-ответе домашняя работа должна быть словарём!',
+            'HOMEWORK_NOT_DICT'
+        )
+    name = homework.get('homework_name')
+    if name is None:
+        raise KeyError(
+            'В информации о домашней работе нет названия!',
+            'HOMEWORK_NAME_NOT_FOUND'
+        )
+    status = homework.get('status')
+    if status is None:
+        raise ApiResponseNotCorrect(
+            'В информации о домашней работе нет статуса работы!',
+            'HOMEWORK_STATUS_NOT_FOUND'
+        )
+    if status not in statuses:
+        raise UndefinedHWStatus(
+            f'Незадокументированный статус домашней работы: {status}',
+            'UNEXPECT_HOMEWORK_STATUS'
+        )
+    return Homework.build(
+        homework.get('id', name), name, status, homework.get('date_updated'),
+        homework.get('lesson_name'), homework.get('reviewer_comment')
+    )